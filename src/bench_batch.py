@@ -0,0 +1,70 @@
+"""Benchmark rendering many small markdown documents (comment-sized inputs).
+
+Compares one `markdown_to_html_node(md).to_html()` call per input with
+`markdown_to_html_batch`, both in this process and on a process pool kept
+across batches. A quarter of the inputs repeat earlier ones, as quoted or
+boilerplate comments do.
+
+Run from src/: python3 bench_batch.py [N] [BATCHES]
+"""
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functions import markdown_to_html_batch, markdown_to_html_node
+
+WORDS = "the a site build page markdown link fast render cache output".split()
+
+
+def make_comment(rng):
+    lines = []
+    for _ in range(rng.randint(1, 4)):
+        words = rng.choices(WORDS, k=rng.randint(5, 25))
+        i = rng.randrange(len(words))
+        mark = rng.choice(["**", "_", "`"])
+        words[i] = mark + words[i] + mark
+        lines.append(" ".join(words))
+    if rng.random() < 0.3:
+        lines.append("- " + " ".join(rng.choices(WORDS, k=4)))
+    if rng.random() < 0.2:
+        lines.append("[a link](https://example.com/" + rng.choice(WORDS) + ")")
+    return "\n\n".join(lines)
+
+
+def make_batch(rng, count):
+    unique = [make_comment(rng) for _ in range(count - count // 4)]
+    return unique + rng.choices(unique, k=count // 4)
+
+
+def timed(label, func, batches, count):
+    start = time.perf_counter()
+    for batch in batches:
+        func(batch)
+    elapsed = time.perf_counter() - start
+    rate = count * len(batches) / elapsed
+    print(f"{label:28s} {elapsed:7.2f}s  {rate:9.0f} docs/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = random.Random(42)
+    batches = [make_batch(rng, count) for _ in range(rounds)]
+
+    timed(
+        "per-call node tree",
+        lambda batch: [markdown_to_html_node(md).to_html() for md in batch],
+        batches,
+        count,
+    )
+    timed("batch, this process", markdown_to_html_batch, batches, count)
+    with ProcessPoolExecutor(os.cpu_count()) as executor:
+        # Start the workers before timing, as a long-lived caller would
+        markdown_to_html_batch(batches[0][:1], executor, min_parallel=1)
+        timed(
+            f"batch, {os.cpu_count()} processes",
+            lambda batch: markdown_to_html_batch(batch, executor),
+            batches,
+            count,
+        )
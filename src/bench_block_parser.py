@@ -0,0 +1,51 @@
+"""Benchmark block parsing on deeply nested documents.
+
+Run from src/: python3 bench_block_parser.py
+
+Time per input byte should stay flat as nesting depth and document size
+double; a growing ratio would mean super-linear work per line.
+"""
+import time
+from block_parser import parse_blocks
+
+
+def nested_lists(depth, repeat):
+    lines = ["  " * i + f"- item {i} with some _text_" for i in range(depth)]
+    return "\n".join(lines * repeat)
+
+
+def nested_quotes(depth, repeat):
+    lines = ["> " * i + "- quoted item" for i in range(1, depth + 1)]
+    return "\n".join(lines * repeat)
+
+
+def nested_blank_lines(depth, repeat):
+    # Blank lines inside deeply nested items, then one inside a quote
+    return "- " * depth + "x" + "\n" * (depth * repeat) + "> " * depth + "\n\n"
+
+
+def quoted_blank_lines(depth, repeat):
+    # Lines of only `>` inside deeply nested items in a quote
+    return "> " + "- " * depth + "x" + "\n>" * (depth * repeat)
+
+
+def bench(label, make, sizes):
+    print(label)
+    for depth, repeat in sizes:
+        md = make(depth, repeat)
+        start = time.perf_counter()
+        parse_blocks(md)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  depth={depth:5d} bytes={len(md):9d} "
+            f"total={elapsed * 1000:8.1f}ms per-byte={elapsed / len(md) * 1e9:6.1f}ns"
+        )
+
+
+if __name__ == "__main__":
+    depths = [(d, 4000 // d) for d in (25, 50, 100, 200, 400)]
+    bench("nested lists", nested_lists, depths)
+    bench("nested quotes", nested_quotes, depths)
+    bench("blank lines in nested items", nested_blank_lines, depths)
+    bench("quoted blank lines in nested items", quoted_blank_lines, depths)
+    bench("document size", nested_lists, [(20, r) for r in (50, 100, 200, 400, 800)])
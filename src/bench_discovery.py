@@ -0,0 +1,72 @@
+"""Benchmark page discovery time and memory on a very large content tree.
+
+Creates N empty markdown files (default 1,000,000, 1,000 per directory) in
+a temporary directory, then reports wall time and tracemalloc peak for
+streaming discovery, collecting the full page list, and the dependency
+graph's one-pass staleness check.
+
+Run from src/: python3 bench_discovery.py [N]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from depgraph import DependencyGraph
+from main import find_pages, iter_pages
+
+PER_DIR = 1000
+
+
+def make_tree(root, count):
+    for i in range(count):
+        if i % PER_DIR == 0:
+            directory = os.path.join(root, f"section-{i // PER_DIR:05d}")
+            os.mkdir(directory)
+        open(os.path.join(directory, f"page-{i:07d}.md"), "w").close()
+
+
+def measured(label, func, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:34s} {elapsed:7.2f}s  peak {peak / 2**20:8.1f} MiB"
+        f"  ({peak / count:6.1f} B/page)"
+    )
+
+
+def consume(pages):
+    for _ in pages:
+        pass
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    root = tempfile.mkdtemp()
+    try:
+        content = os.path.join(root, "content")
+        os.mkdir(content)
+        start = time.perf_counter()
+        make_tree(content, count)
+        print(f"created {count} files in {time.perf_counter() - start:.1f}s")
+
+        dest = os.path.join(root, "public")
+        graph = DependencyGraph(content, os.path.join(root, "static"))
+        measured(
+            "iter_pages (streaming)",
+            lambda: consume(iter_pages(content, dest)),
+            count,
+        )
+        measured("find_pages (full list)", lambda: find_pages(content, dest), count)
+        measured(
+            "stale_pages over iter_pages",
+            lambda: graph.stale_pages(iter_pages(content, dest)),
+            count,
+        )
+    finally:
+        shutil.rmtree(root)
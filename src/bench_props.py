@@ -0,0 +1,30 @@
+"""Benchmark attribute serialization and escaping on a link-dense page.
+
+Run from src/: python3 bench_props.py
+"""
+import time
+from functions import markdown_to_html, markdown_to_html_node
+from htmlnode import LeafNode
+
+LINKS = " ".join(
+    f"[link {i}](https://example.com/page/{i}?ref=a&b={i}) ![img {i}](/images/{i}.png)"
+    for i in range(20)
+)
+DOCUMENT = "# Links\n\n" + (LINKS + "\n\n") * 500
+
+
+def timed(label, func, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    print(f"{label:28s} {(time.perf_counter() - start) / repeat * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    nodes = [
+        LeafNode("a", f"link {i}", props={"href": f"https://example.com/{i}"})
+        for i in range(20000)
+    ]
+    timed("LeafNode.to_html x20000", lambda: [node.to_html() for node in nodes])
+    timed("node tree page", lambda: markdown_to_html_node(DOCUMENT).to_html())
+    timed("direct page", lambda: markdown_to_html(DOCUMENT))
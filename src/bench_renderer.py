@@ -0,0 +1,31 @@
+"""Compare the direct HTMLRenderer with building and serializing HTMLNodes.
+
+Run from src/: python3 bench_renderer.py
+"""
+import time
+import tracemalloc
+from functions import markdown_to_html, markdown_to_html_node
+
+PARAGRAPH = (
+    "Some **bold** text with _italic_, `code`, a [link](https://example.com/x) "
+    "and an ![image](/images/x.png) in it.\n\n"
+)
+DOCUMENT = "# Title\n\n" + PARAGRAPH * 2000
+
+
+def measure(label, render):
+    start = time.perf_counter()
+    for _ in range(5):
+        render(DOCUMENT)
+    elapsed = (time.perf_counter() - start) / 5
+
+    tracemalloc.start()
+    render(DOCUMENT)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:12s} {elapsed * 1000:8.1f}ms  peak {peak / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    measure("node tree", lambda md: markdown_to_html_node(md).to_html())
+    measure("direct", markdown_to_html)
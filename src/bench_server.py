@@ -0,0 +1,90 @@
+"""Load-test the in-memory site server against http.server on the built site.
+
+Each client thread keeps one HTTP/1.1 connection open and requests every
+file of docs/ in turn; half of the clients send gzip Accept-Encoding and,
+once they have seen a file, its ETag as If-None-Match (as browsers do).
+
+Run from src/ after a build: python3 bench_server.py [CLIENTS] [REQUESTS]
+"""
+import functools
+import http.client
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from server import SiteFiles, start_in_thread
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS = os.path.join(PROJECT_ROOT, "docs")
+
+
+class _DiskHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load(address, paths, clients, requests, revalidate):
+    statuses = {}
+    lock = threading.Lock()
+
+    def client(index):
+        conn = http.client.HTTPConnection(*address)
+        etags = {}
+        counts = {}
+        caching = revalidate and index % 2 == 0
+        for i in range(requests):
+            path = paths[i % len(paths)]
+            headers = {}
+            if caching:
+                headers["Accept-Encoding"] = "gzip"
+                if path in etags:
+                    headers["If-None-Match"] = etags[path]
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.headers.get("ETag"):
+                etags[path] = response.headers["ETag"]
+            counts[response.status] = counts.get(response.status, 0) + 1
+        conn.close()
+        with lock:
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return clients * requests / (time.perf_counter() - start), statuses
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    site = SiteFiles.from_directory(DOCS)
+    paths = sorted(site.files)
+
+    handler = functools.partial(_DiskHandler, directory=DOCS)
+    disk = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=disk.serve_forever, daemon=True).start()
+    memory = start_in_thread(site)
+
+    for label, server, revalidate in [
+        ("http.server (disk)", disk, False),
+        ("SiteServer (memory)", memory, False),
+        ("SiteServer, ETag + gzip", memory, True),
+    ]:
+        rate, statuses = load(
+            server.server_address[:2], paths, clients, requests, revalidate
+        )
+        statuses = dict(sorted(statuses.items()))
+        print(f"{label:26s} {rate:9.0f} req/s  statuses {statuses}")
+
+    for server in (disk, memory):
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,56 @@
+"""Measure CLI startup with `python -X importtime` against a budget.
+
+Each scenario runs in a fresh interpreter a few times; the best cumulative
+import time of the measured module is compared with its budget and the
+script exits non-zero if any budget is exceeded.
+
+Run from src/: python3 bench_startup.py
+"""
+import os
+import subprocess
+import sys
+
+REPEAT = 5
+
+# scenario -> (interpreter arguments, module whose cumulative time counts,
+# budget in microseconds)
+SCENARIOS = {
+    "import main (CLI, --help)": (["-c", "import main"], "main", 20000),
+    "import daemon (--rebuild)": (["-c", "import daemon"], "daemon", 25000),
+    "import functions (render)": (["-c", "import functions"], "functions", 35000),
+}
+
+
+def cumulative_us(args, module):
+    """Return the cumulative import time of `module` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f"{module} not found in importtime output")
+
+
+def measure(repeat=REPEAT):
+    """Return {scenario: (best cumulative time in us, budget in us)}."""
+    return {
+        label: (min(cumulative_us(args, module) for _ in range(repeat)), budget)
+        for label, (args, module, budget) in SCENARIOS.items()
+    }
+
+
+if __name__ == "__main__":
+    failed = False
+    for label, (best, budget) in measure().items():
+        status = "ok" if best <= budget else "OVER BUDGET"
+        failed = failed or best > budget
+        print(
+            f"{label:28s} {best / 1000:8.2f}ms"
+            f"  budget {budget / 1000:6.1f}ms  {status}"
+        )
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,328 @@
+import os
+import re
+from bisect import bisect_left
+
+# Block kinds produced by parse_blocks. Containers hold child blocks; leaves
+# hold lines of text.
+DOCUMENT = "document"
+QUOTE = "quote"
+LIST = "list"
+ITEM = "item"
+PARAGRAPH = "paragraph"
+HEADING = "heading"
+CODE = "code"
+
+_CONTAINERS = {DOCUMENT, QUOTE, LIST, ITEM}
+
+_LIST_MARKER = re.compile(r"(?:(-)|(\d{1,9})\.) ")
+_HEADING = re.compile(r"(#{1,6}) ")
+# A link reference definition line: [label]: url
+_DEFINITION = re.compile(r"\[([^\[\]]+)\]:[ \t]*<?([^\s<>]+)>?[ \t]*")
+
+
+class Block:
+    """A node of the block tree built by `parse_blocks`."""
+
+    def __init__(self, kind, **attrs):
+        self.kind = kind
+        self.children = []
+        self.lines = []
+        # document: definitions; list: ordered, next_number; item:
+        # content_indent, loose, opened_after; heading: level; code: language
+        self.__dict__.update(attrs)
+
+    @property
+    def text(self):
+        """Joined text of a leaf block."""
+        if self.kind == CODE:
+            return "\n".join(self.lines)
+        return "\n".join(self.lines).rstrip()
+
+    def __repr__(self):
+        if self.kind in _CONTAINERS:
+            return f"Block({self.kind}, {self.children})"
+        return f"Block({self.kind}, {self.text!r})"
+
+
+def _next_nonspace(line, pos):
+    """Return the index of the first non-space at or after pos."""
+    end = len(line)
+    while pos < end and line[pos] == " ":
+        pos += 1
+    return pos
+
+
+class _Parser:
+    """
+    Single forward pass over lines keeping a stack of open blocks.
+
+    For each line the open containers are matched first (a quote needs its
+    `>`, an item needs enough indentation), then new containers are opened,
+    and whatever remains is added to a leaf. Lines are never re-split, and
+    each character is looked at a bounded number of times. Matching an item
+    consumes its indentation and matching a quote its `>`, except once the
+    rest of the line is blank, which matches every item up to the next open
+    quote: that is looked up directly, and blank lines are counted rather
+    than flagged on each open item, so a blank line costs O(log depth) at
+    most. The work is linear in the input size, up to that factor, however
+    deep the nesting goes.
+    """
+
+    def __init__(self, definitions):
+        self.document = Block(DOCUMENT, definitions=definitions)
+        self.stack = [self.document]
+        # Stack indexes of the open quotes, outermost first
+        self.quotes = []
+        # Blank lines seen, and the count when content last followed one
+        self.blanks = 0
+        self.blanks_cleared = 0
+
+    def parse(self, text):
+        for line in text.split("\n"):
+            self._add_line(line)
+        return self.document
+
+    def _leaf(self):
+        tip = self.stack[-1]
+        return None if tip.kind in _CONTAINERS else tip
+
+    def _close_to(self, depth):
+        # Keep stack[0:depth + 1], closing everything deeper
+        del self.stack[depth + 1 :]
+        quotes = self.quotes
+        while quotes and quotes[-1] > depth:
+            quotes.pop()
+
+    def _blank_pending(self, item):
+        """Whether a blank line followed content since `item` was opened."""
+        return self.blanks_cleared < self.blanks and item.opened_after < self.blanks
+
+    def _append(self, depth, block):
+        self._close_to(depth)
+        parent = self.stack[depth]
+        if parent.kind == ITEM and parent.children and self._blank_pending(parent):
+            parent.loose = True
+        if block.kind == QUOTE:
+            self.quotes.append(len(self.stack))
+        parent.children.append(block)
+        self.stack.append(block)
+        return depth + 1
+
+    def _add_line(self, line):
+        stack = self.stack
+        leaf = self._leaf()
+        containers = len(stack) - (1 if leaf else 0)
+
+        # 1) Match the open containers. `nonspace` is only rescanned once pos
+        # moves past it, so leading spaces are scanned once per line.
+        pos = 0
+        nonspace = _next_nonspace(line, 0)
+        matched = 1
+        while matched < containers:
+            block = stack[matched]
+            if nonspace < pos:
+                nonspace = _next_nonspace(line, pos)
+            if nonspace == len(line):
+                # A blank rest matches every item up to the next open quote,
+                # which it cannot match
+                i = bisect_left(self.quotes, matched)
+                matched = self.quotes[i] if i < len(self.quotes) else containers
+                break
+            if block.kind == QUOTE:
+                if nonspace - pos > 3 or not line.startswith(">", nonspace):
+                    break
+                pos = nonspace + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+            elif block.kind == ITEM:
+                if nonspace - pos >= block.content_indent:
+                    pos += block.content_indent
+                else:
+                    break
+            matched += 1
+        all_matched = matched == containers
+        depth = matched - 1
+
+        # An open fenced code block takes the line verbatim until its close
+        if leaf is not None and leaf.kind == CODE:
+            if all_matched:
+                fence = line[pos:].strip()
+                # Only a line of three or more backticks closes the fence
+                if len(fence) >= 3 and fence.strip("`") == "":
+                    self._close_to(depth)
+                else:
+                    leaf.lines.append(line[pos:])
+                return
+            self._close_to(depth)
+            leaf = None
+
+        # 2) Open new containers. Nothing interrupts a paragraph except a
+        # nested list inside a list item.
+        continuing = leaf is not None and all_matched
+        only_lists = continuing and stack[depth].kind == ITEM
+        started = False
+        while not continuing or only_lists:
+            if nonspace < pos:
+                nonspace = _next_nonspace(line, pos)
+            if nonspace - pos > 3:
+                break
+            if not only_lists and line.startswith(">", nonspace):
+                if stack[depth].kind == LIST:
+                    depth -= 1
+                depth = self._append(depth, Block(QUOTE))
+                pos = nonspace + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+                started = True
+                continue
+
+            m = _LIST_MARKER.match(line, nonspace)
+            if not m or _next_nonspace(line, m.end()) == len(line):
+                break
+            ordered = m.group(2) is not None
+            number = int(m.group(2)) if ordered else None
+            container = stack[depth]
+            if container.kind == LIST and container.ordered == ordered and (
+                not ordered or number == container.next_number
+            ):
+                list_depth = depth
+            elif not ordered or number == 1:
+                list_block = Block(LIST, ordered=ordered, next_number=1)
+                if container.kind == LIST:
+                    depth -= 1
+                list_depth = self._append(depth, list_block)
+            else:
+                break
+            if ordered:
+                stack[list_depth].next_number = number + 1
+
+            # Content starts after the marker and its spaces (just one space
+            # if there are more than four); continuation lines must be
+            # indented at least that far
+            spaces = _next_nonspace(line, m.end()) - m.end() + 1
+            content_pos = m.end() - 1 + (spaces if spaces <= 4 else 1)
+            item = Block(
+                ITEM,
+                content_indent=content_pos - pos,
+                loose=False,
+                opened_after=self.blanks,
+            )
+            depth = self._append(list_depth, item)
+            pos = content_pos
+            started = True
+            only_lists = False
+            continuing = False
+
+        # A list can only hold items; anything else closes it
+        if stack[depth].kind == LIST:
+            depth -= 1
+
+        if nonspace < pos:
+            nonspace = _next_nonspace(line, pos)
+        blank = nonspace == len(line)
+        leaf = self._leaf()
+
+        if blank:
+            self._close_to(depth)
+            self.blanks += 1
+            return
+
+        # 3) Continue the open paragraph, including lazy continuation lines
+        if leaf is not None and leaf.kind == PARAGRAPH and not started:
+            leaf.lines.append(line[pos:])
+            return
+
+        # 4) Start a new leaf, unless the line is a link reference definition
+        rest = line[nonspace:]
+        definition = _DEFINITION.fullmatch(rest)
+        label = normalize_label(definition.group(1)) if definition else ""
+        heading = _HEADING.match(rest)
+        if heading and not rest[heading.end() :].strip():
+            # A marker with no text is an ordinary paragraph line
+            heading = None
+        if label:
+            self._close_to(depth)
+            # As in CommonMark, the first definition of a label wins
+            self.document.definitions.setdefault(label, definition.group(2))
+        elif heading:
+            level = len(heading.group(1))
+            block = Block(HEADING, level=level)
+            block.lines.append(rest[level + 1 :])
+            self._append(depth, block)
+            self._close_to(depth)
+        elif rest.startswith("```"):
+            info = rest[3:]
+            if info.rstrip().endswith("```"):
+                # Single-line fence like ```code```
+                block = Block(CODE, language="")
+                block.lines.append(info.rstrip()[:-3])
+                self._append(depth, block)
+                self._close_to(depth)
+            else:
+                language = info.split()[0] if info.strip() else ""
+                self._append(depth, Block(CODE, language=language))
+        else:
+            block = Block(PARAGRAPH)
+            block.lines.append(rest)
+            self._append(depth, block)
+
+        self.blanks_cleared = self.blanks
+
+
+def normalize_label(label):
+    """Return the lookup key for a link label: case-folded, spaces collapsed."""
+    return " ".join(label.split()).casefold()
+
+
+def parse_blocks(markdown, definitions=None):
+    """
+    Parse markdown into a tree of `Block`s, supporting nested containers.
+
+    Quotes may contain lists and other quotes, list items may contain nested
+    lists, code and several paragraphs, and fenced code may contain blank
+    lines. Only a blank line ends a paragraph, except that a list item's
+    paragraph may be followed directly by a nested list.
+
+    Link reference definitions (`[id]: url` lines outside a paragraph) are
+    not rendered; they are collected into the document's `definitions`
+    dict, keyed by `normalize_label`. Pass a dict as `definitions` to
+    collect them into it instead, e.g. to gather them across several files.
+    """
+    if definitions is None:
+        definitions = {}
+    if markdown is None:
+        return Block(DOCUMENT, definitions=definitions)
+    text = str(markdown).replace("\r\n", "\n").replace("\r", "\n")
+    return _Parser(definitions).parse(text)
+
+
+def load_definitions(path):
+    """Return the link reference definitions in a markdown file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_blocks(f.read()).definitions
+
+
+class DefinitionsFile:
+    """
+    The link definitions in a file such as links.md, for long-running servers.
+
+    `get` re-parses the file only when its stat key (mtime, size) changed
+    since the last call, and returns a new dict exactly then; a missing file
+    has no definitions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._key = None
+        self._definitions = None
+
+    def get(self):
+        try:
+            st = os.stat(self.path)
+            key = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            key = None
+        if self._definitions is None or key != self._key:
+            self._definitions = load_definitions(self.path) if key else {}
+            self._key = key
+        return self._definitions
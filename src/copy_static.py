@@ -1,40 +1,57 @@
 import os
 import shutil
+import time
+import events
 
 
-def copy_static_to_public(source_dir="static", dest_dir="public"):
+def copy_static_to_public(source_dir="static", dest_dir="public", writer=None):
     """
     Recursively copies all contents from source directory to destination directory.
-    First deletes all contents of the destination directory to ensure a clean copy.
+    First deletes all contents of the destination directory to ensure a clean copy,
+    unless a writer is given.
 
     Args:
         source_dir: Path to the source directory (default: "static")
         dest_dir: Path to the destination directory (default: "public")
+        writer: Optional OutputWriter or BundleWriter; files are then copied
+            through it, leaving identical files untouched, and the destination
+            is not deleted
     """
+    if writer is not None:
+        # The writer creates directories as needed (or none, for a bundle)
+        _copy_directory_contents(source_dir, dest_dir, writer)
+        return
+
     # Delete the destination directory if it exists
     if os.path.exists(dest_dir):
-        print(f"Deleting destination directory: {dest_dir}")
+        events.emit("clean", path=dest_dir)
         shutil.rmtree(dest_dir)
 
     # Create the destination directory
-    print(f"Creating destination directory: {dest_dir}")
+    events.emit("mkdir", events.VERBOSE, path=dest_dir)
     os.makedirs(dest_dir)
 
     # Recursively copy contents
     _copy_directory_contents(source_dir, dest_dir)
 
 
-def _copy_directory_contents(source_dir, dest_dir):
+def _copy_directory_contents(source_dir, dest_dir, writer=None):
     """
     Recursively copies all files and subdirectories from source to destination.
 
     Args:
         source_dir: Path to the source directory
         dest_dir: Path to the destination directory
+        writer: Optional OutputWriter used instead of shutil.copy2
     """
     # Check if source directory exists
     if not os.path.exists(source_dir):
-        print(f"Warning: Source directory does not exist: {source_dir}")
+        events.emit(
+            "warning",
+            events.QUIET,
+            message="Source directory does not exist",
+            path=source_dir,
+        )
         return
 
     # List all items in the source directory
@@ -46,10 +63,26 @@ def _copy_directory_contents(source_dir, dest_dir):
 
         if os.path.isfile(source_path):
             # Copy file
-            print(f"Copying file: {source_path} -> {dest_path}")
-            shutil.copy2(source_path, dest_path)
+            start = time.perf_counter()
+            if writer is None:
+                shutil.copy2(source_path, dest_path)
+                written = True
+            else:
+                written = writer.copy(source_path, dest_path)
+            size = os.path.getsize(source_path)
+            events.emit(
+                "copy",
+                events.VERBOSE,
+                source=source_path,
+                dest=dest_path,
+                result="written" if written else "unchanged",
+                duration_ms=events.elapsed_ms(start),
+                bytes_in=size,
+                bytes_out=size,
+            )
         elif os.path.isdir(source_path):
             # Create subdirectory and recursively copy its contents
-            print(f"Creating directory: {dest_path}")
-            os.makedirs(dest_path)
-            _copy_directory_contents(source_path, dest_path)
+            if writer is None and not os.path.isdir(dest_path):
+                events.emit("mkdir", events.VERBOSE, path=dest_path)
+                os.makedirs(dest_path)
+            _copy_directory_contents(source_path, dest_path, writer)
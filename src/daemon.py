@@ -0,0 +1,203 @@
+import json
+import os
+import socket
+import socketserver
+
+
+class SiteBuilder:
+    """
+    Keeps build state in memory between rebuilds.
+
+    Holds a stat snapshot of static assets and, for every markdown source,
+    its stat key, rendered body, title and the template it was written with.
+    A rebuild only re-parses sources whose size or mtime changed, and only
+    rewrites unchanged pages whose template (or one of its partials or
+    layouts) changed. Link definitions shared by every page are read from
+    `links_path`; when it changes, every page is re-rendered.
+    """
+
+    def __init__(
+        self,
+        content_dir,
+        template_path,
+        static_dir,
+        dest_dir,
+        basepath="/",
+        links_path=None,
+    ):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        self.links_path = links_path
+        self._definitions_file = None
+        if links_path:
+            from block_parser import DefinitionsFile
+
+            self._definitions_file = DefinitionsFile(links_path)
+        self._definitions = None
+        self._static_snapshot = None
+        self._writer = None
+        # source path -> (stat key, title, content html, toc html, template path)
+        self._pages = {}
+
+    def build(self, full=False):
+        """Rebuild the site, re-rendering only what changed unless `full`."""
+        # Imported here so `--rebuild` clients only load the socket code, and
+        # to avoid a circular import with main.py
+        from copy_static import copy_static_to_public
+        from functions import markdown_to_html, extract_title
+        from main import find_pages, render_page
+        from output import OutputWriter
+        from templates import load_template, refresh_templates, section_template
+        from toc import Outline
+
+        if self._writer is None:
+            self._writer = OutputWriter()
+
+        if self._definitions_file is not None:
+            definitions = self._definitions_file.get()
+            if definitions is not self._definitions:
+                # Rendered bodies depend on the definitions
+                self._definitions = definitions
+                full = True
+
+        if full:
+            self._pages.clear()
+            self._static_snapshot = None
+
+        stats = {
+            "rendered": 0,
+            "cached": 0,
+            "written": 0,
+            "removed": 0,
+            "static_copied": False,
+        }
+
+        static_snapshot = _snapshot(self.static_dir)
+        if static_snapshot != self._static_snapshot:
+            copy_static_to_public(self.static_dir, self.dest_dir, writer=self._writer)
+            self._static_snapshot = static_snapshot
+            stats["static_copied"] = True
+
+        changed_templates = refresh_templates()
+
+        pages = find_pages(self.content_dir, self.dest_dir)
+        seen = set()
+        for from_path, dest_path in pages:
+            seen.add(from_path)
+            key = _stat_key(from_path)
+            template_path = section_template(
+                self.content_dir, from_path, self.template_path
+            )
+            cached = self._pages.get(from_path)
+            if cached is not None and cached[0] == key:
+                stats["cached"] += 1
+                template_changed = template_path in changed_templates
+                if cached[4] == template_path and not template_changed:
+                    continue
+                _, title, content_html, toc_html, _ = cached
+                self._pages[from_path] = cached[:4] + (template_path,)
+            else:
+                with open(from_path, "r", encoding="utf-8") as f:
+                    md = f.read()
+                outline = Outline()
+                content_html = markdown_to_html(
+                    md, outline=outline, definitions=self._definitions
+                )
+                title = extract_title(md)
+                toc_html = outline.to_html()
+                self._pages[from_path] = (
+                    key,
+                    title,
+                    content_html,
+                    toc_html,
+                    template_path,
+                )
+                stats["rendered"] += 1
+
+            template = load_template(template_path)
+            page = render_page(template, title, content_html, self.basepath, toc_html)
+            if self._writer.write(dest_path, page):
+                stats["written"] += 1
+
+        for from_path in set(self._pages) - seen:
+            del self._pages[from_path]
+            rel = os.path.relpath(from_path, self.content_dir)
+            dest_path = os.path.join(self.dest_dir, rel[:-3] + ".html")
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            stats["removed"] += 1
+
+        return stats
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _snapshot(directory):
+    snapshot = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            snapshot[path] = _stat_key(path)
+    return snapshot
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        command = self.rfile.readline().decode("utf-8").strip() or "build"
+        builder = self.server.builder
+
+        if command == "ping":
+            response = {"ok": True}
+        elif command in ("build", "full"):
+            try:
+                response = {"ok": True, **builder.build(full=command == "full")}
+            except Exception as exc:
+                response = {"ok": False, "error": str(exc)}
+        elif command == "shutdown":
+            response = {"ok": True}
+            self.server.shutdown_requested = True
+        else:
+            response = {"ok": False, "error": f"Unknown command: {command}"}
+
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class BuildServer(socketserver.UnixStreamServer):
+    """Unix socket server answering one-line build commands."""
+
+    def __init__(self, socket_path, builder):
+        self.builder = builder
+        self.shutdown_requested = False
+        super().__init__(socket_path, _RequestHandler)
+
+
+def serve(socket_path, builder):
+    """Do an initial build, then serve rebuild requests until shut down."""
+    import events
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    events.emit("summary", **builder.build(full=True))
+    with BuildServer(socket_path, builder) as server:
+        events.emit("daemon", socket=socket_path)
+        try:
+            while not server.shutdown_requested:
+                server.handle_request()
+        finally:
+            os.remove(socket_path)
+
+
+def send_request(socket_path, command="build"):
+    """Send a command to a running daemon and return its decoded response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((command + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
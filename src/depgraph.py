@@ -0,0 +1,248 @@
+import json
+import os
+from typing import Iterable
+from output import write_atomic
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class DependencyGraph:
+    """
+    Records what each generated page was built from, across builds.
+
+    For every markdown source it stores the output path, the page title,
+    a stat fingerprint of each input file (the source and images it
+    references under static/), the template it used and the sources of
+    internal pages it links to. Given the default `template_path`, the
+    section template looked up for a page is an input too, fingerprinted as
+    missing when it does not exist, so adding one makes its pages stale.
+    Template files are fingerprinted once per template rather than per
+    page, and `shared_inputs`, files every page depends on (such as the
+    site-wide link definitions), once for the whole graph, so records stay
+    small on large sites.
+    `stale_pages` compares all of this against the current tree so only
+    affected pages are rebuilt. The graph is discarded when the build
+    config (e.g. basepath) differs from the saved one.
+
+    Records are updated as pages are rendered, so a graph saved mid-build
+    (a checkpoint) no longer shows the pages still to do as stale: a new
+    template fingerprint or title covers them too. The stale set is
+    therefore saved with it, less the pages recorded since, and a build
+    resumed from the checkpoint renders those as well.
+    """
+
+    def __init__(
+        self,
+        content_dir,
+        static_dir,
+        path=None,
+        config=None,
+        template_path=None,
+        shared_inputs=(),
+    ):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.shared_inputs = list(shared_inputs)
+        self.path = path
+        self.config = config or {}
+        # source path -> {"output", "title", "template", "inputs": {path: key},
+        # "links": [...]}
+        self.pages = {}
+        # template path -> {template file: key}
+        self.templates = {}
+        # shared input -> key, as of the last page recorded
+        self.shared = {}
+        # templates fingerprinted during this build
+        self._recorded_templates = set()
+        self._recorded_shared = False
+        # sources found stale and not recorded yet in this (or the
+        # interrupted) build
+        self.pending = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            if data.get("config") == self.config:
+                self.pages = data.get("pages", {})
+                self.templates = data.get("templates", {})
+                self.shared = data.get("shared", {})
+                self.pending = set(data.get("pending", []))
+
+    def stale_pages(self, pages: Iterable[tuple[str, str]]) -> set[str]:
+        """Return the sources in (source, dest) `pages` that must be rebuilt.
+
+        A page is stale if it is new, its output is missing, its template, a
+        shared input or any recorded input changed, a page it links to was
+        added, removed or retitled, or it was still pending when a
+        checkpoint was saved.
+        `pages` is consumed in one pass and only source paths are kept, so
+        it can be a generator over a very large tree.
+        """
+        stat_cache = {}
+
+        def changed(path, key):
+            if path not in stat_cache:
+                stat_cache[path] = _stat_key(path)
+            return stat_cache[path] != key
+
+        template_changed = {}
+
+        def template_stale(path):
+            if path not in template_changed:
+                deps = self.templates.get(path)
+                template_changed[path] = deps is None or any(
+                    changed(dep, key) for dep, key in deps.items()
+                )
+            return template_changed[path]
+
+        sources = set()
+        stale = set()
+        # Sources whose presence or title differs from the recorded graph
+        retitled = set()
+        shared_changed = set(self.shared) != set(self.shared_inputs) or any(
+            changed(path, key) for path, key in self.shared.items()
+        )
+
+        for source, dest in pages:
+            sources.add(source)
+            record = self.pages.get(source)
+            if shared_changed:
+                stale.add(source)
+            if record is None:
+                stale.add(source)
+                retitled.add(source)
+                continue
+            if record["output"] != dest or not os.path.exists(dest):
+                stale.add(source)
+            if changed(source, record["inputs"].get(source)):
+                from functions import extract_title
+
+                stale.add(source)
+                with open(source, "r", encoding="utf-8") as f:
+                    md = f.read()
+                try:
+                    title = extract_title(md)
+                except ValueError:
+                    title = None
+                if title != record["title"]:
+                    retitled.add(source)
+            elif any(changed(p, key) for p, key in record["inputs"].items()):
+                stale.add(source)
+            elif record.get("template") and template_stale(record["template"]):
+                stale.add(source)
+
+        retitled.update(source for source in self.pages if source not in sources)
+        for source in sources:
+            record = self.pages.get(source)
+            if record and not retitled.isdisjoint(record["links"]):
+                stale.add(source)
+        stale.update(self.pending & sources)
+        self.pending = set(stale)
+        return stale
+
+    def record_page(self, source, dest, title, template, hrefs, srcs):
+        """Record the inputs of a page that was just generated.
+
+        `template` is the compiled template used; `hrefs` and `srcs` are the
+        link and image URLs found while rendering the page.
+        """
+        self.pending.discard(source)
+        inputs = {source: _stat_key(source)}
+        if not self._recorded_shared:
+            self._recorded_shared = True
+            self.shared = {path: _stat_key(path) for path in self.shared_inputs}
+        if self.template_path:
+            from templates import section_template_candidate
+
+            candidate = section_template_candidate(
+                self.content_dir, source, self.template_path
+            )
+            if candidate:
+                inputs[candidate] = _stat_key(candidate)
+        if template.path and template.path not in self._recorded_templates:
+            self._recorded_templates.add(template.path)
+            self.templates[template.path] = {
+                path: _stat_key(path) for path in template.dependencies
+            }
+        for url in srcs:
+            path = self._static_path(url)
+            if path:
+                inputs[path] = _stat_key(path)
+
+        links = set()
+        for url in hrefs:
+            links.update(self._page_sources(url))
+
+        self.pages[source] = {
+            "output": dest,
+            "title": title,
+            "template": template.path,
+            "inputs": inputs,
+            "links": sorted(links),
+        }
+
+    def forget_missing(self, sources: set[str]) -> None:
+        """Drop records for sources not in `sources` and unused templates."""
+        for source in list(self.pages):
+            if source not in sources:
+                del self.pages[source]
+        self.pending &= sources
+        used = {record.get("template") for record in self.pages.values()}
+        for path in list(self.templates):
+            if path not in used:
+                del self.templates[path]
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "config": self.config,
+            "pages": self.pages,
+            "templates": self.templates,
+            "shared": self.shared,
+        }
+        if self.pending:
+            data["pending"] = sorted(self.pending)
+        write_atomic(self.path, json.dumps(data, sort_keys=True).encode("utf-8"))
+
+    @staticmethod
+    def _local_path(url):
+        from urllib.parse import unquote, urlsplit
+
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path.startswith("/"):
+            return None
+        return unquote(parts.path).lstrip("/")
+
+    def _static_path(self, url):
+        rel = self._local_path(url)
+        if not rel:
+            return None
+        return os.path.join(self.static_dir, *rel.split("/"))
+
+    def _page_sources(self, url):
+        # Candidate sources for an internal link, whether or not they exist yet
+        rel = self._local_path(url)
+        if rel is None:
+            return []
+        rel = rel.rstrip("/")
+        if rel.endswith(".html"):
+            rel = rel[:-5]
+            if rel.endswith("/index") or rel == "index":
+                rel = rel[:-5].rstrip("/")
+        base = self.content_dir
+        if rel:
+            base = os.path.join(base, *rel.split("/"))
+        candidates = [os.path.join(base, "index.md")]
+        if rel:
+            candidates.append(base + ".md")
+        return candidates
@@ -0,0 +1,162 @@
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Verbosity levels: QUIET writes only warnings, NORMAL also writes build
+# stages and summaries, VERBOSE also writes one event per page and file
+QUIET = 0
+NORMAL = 1
+VERBOSE = 2
+
+_METRIC_PREFIX = "site_build"
+
+
+class EventLog:
+    """
+    Build event log writing JSON lines and aggregating metrics.
+
+    Every `emit` updates the counters, whatever the verbosity; only events
+    at or below `verbosity` are written, one JSON object per line with the
+    event name, a timestamp and the given fields. Well-known fields feed the
+    metrics: `result` (e.g. "written", "unchanged", "cached") is counted,
+    `duration_ms` is summed per event and `bytes_in`/`bytes_out` are summed
+    per event and direction.
+    """
+
+    def __init__(self, stream=None, verbosity=NORMAL):
+        # None writes to whatever sys.stdout is at the time of the event
+        self.stream = stream
+        self.verbosity = verbosity
+        # (event, result) -> count
+        self.counts = defaultdict(int)
+        # event -> total seconds
+        self.seconds = defaultdict(float)
+        # (event, "in" | "out") -> total bytes
+        self.bytes = defaultdict(int)
+        # stage name -> seconds
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, level: int = NORMAL, **fields) -> None:
+        # Servers emit from several threads
+        with self._lock:
+            self.counts[(event, fields.get("result", ""))] += 1
+            if "duration_ms" in fields:
+                self.seconds[event] += fields["duration_ms"] / 1000
+            if "bytes_in" in fields:
+                self.bytes[(event, "in")] += fields["bytes_in"]
+            if "bytes_out" in fields:
+                self.bytes[(event, "out")] += fields["bytes_out"]
+
+        if level > self.verbosity:
+            return
+        record = {"event": event, "ts": round(time.time(), 3), **fields}
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        """Time a build stage and emit a "stage" event when it finishes."""
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.emit("stage", stage=name, duration_ms=_ms(seconds), **fields)
+
+    def metrics_text(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            if not samples:
+                return
+            lines.append(f"# HELP {_METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {_METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(str(val))}"' for key, val in labels
+                )
+                lines.append(f"{_METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+
+        metric(
+            "events_total",
+            "counter",
+            "Build events by event name and result.",
+            [
+                ((("event", event), ("result", result)), count)
+                for (event, result), count in sorted(self.counts.items())
+            ],
+        )
+        metric(
+            "event_seconds_total",
+            "counter",
+            "Time spent in timed events, by event name.",
+            [
+                ((("event", event),), f"{seconds:.6f}")
+                for event, seconds in sorted(self.seconds.items())
+            ],
+        )
+        metric(
+            "bytes_total",
+            "counter",
+            "Bytes read and written, by event name and direction.",
+            [
+                ((("event", event), ("direction", direction)), total)
+                for (event, direction), total in sorted(self.bytes.items())
+            ],
+        )
+        metric(
+            "stage_seconds",
+            "gauge",
+            "Duration of each build stage in the last build.",
+            [
+                ((("stage", name),), f"{seconds:.6f}")
+                for name, seconds in self.stages.items()
+            ],
+        )
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_metrics(self, path: str) -> None:
+        """Write `metrics_text` atomically, e.g. for a node_exporter textfile."""
+        from output import write_atomic
+
+        write_atomic(path, self.metrics_text().encode("utf-8"))
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The log used by the build; replaced by `configure`
+_log = EventLog()
+
+
+def configure(stream=None, verbosity: int = NORMAL) -> EventLog:
+    """Start a new build log and return it."""
+    global _log
+    _log = EventLog(stream, verbosity)
+    return _log
+
+
+def current() -> EventLog:
+    return _log
+
+
+def emit(event: str, level: int = NORMAL, **fields) -> None:
+    _log.emit(event, level, **fields)
+
+
+def stage(name: str, **fields):
+    return _log.stage(name, **fields)
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since `start`, a `time.perf_counter()` value."""
+    return _ms(time.perf_counter() - start)
@@ -1,7 +1,19 @@
 import re
+from collections import ChainMap
 from enum import Enum
 from textnode import TextNode, TextType
-from htmlnode import ParentNode, text_node_to_html_node
+from htmlnode import text_node_to_html_node
+from highlight import tokenize
+from renderer import HTMLRenderer, NodeTreeRenderer
+import block_parser
+
+_IMAGE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+_LINK = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# [text][id], [text][] or [text], optionally an image with a leading !
+_REFERENCE = re.compile(r"(!?)\[([^\[\]]*)\](?:\[([^\[\]]*)\])?")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+_HEADING = re.compile(r"#{1,6} ")
+_TITLE = re.compile(r"#\s+(.*)")
 
 
 class BlockType(Enum):
@@ -35,11 +47,11 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _IMAGE.findall(text)
 
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _LINK.findall(text)
 
 
 def split_nodes_image(old_nodes):
@@ -49,34 +61,7 @@ def split_nodes_image(old_nodes):
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
-
-        # Extract all images from the node's text
-        images = extract_markdown_images(node.text)
-
-        if not images:
-            new_nodes.append(node)
-            continue
-
-        # Split the text by images
-        remaining_text = node.text
-        for alt_text, url in images:
-            # Find the full image markdown syntax
-            image_markdown = f"![{alt_text}]({url})"
-            parts = remaining_text.split(image_markdown, 1)
-
-            # Add the text before the image
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
-
-            # Add the image node
-            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-
-            # Continue with the remaining text
-            remaining_text = parts[1] if len(parts) > 1 else ""
-
-        # Add any remaining text after the last image
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        _split_on_matches(node, _IMAGE, TextType.IMAGE, new_nodes)
 
     return new_nodes
 
@@ -88,39 +73,72 @@ def split_nodes_link(old_nodes):
         if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
+        _split_on_matches(node, _LINK, TextType.LINK, new_nodes)
 
-        # Extract all links from the node's text
-        links = extract_markdown_links(node.text)
-
-        if not links:
-            new_nodes.append(node)
-            continue
+    return new_nodes
 
-        # Split the text by links
-        remaining_text = node.text
-        for link_text, url in links:
-            # Find the full link markdown syntax
-            link_markdown = f"[{link_text}]({url})"
-            parts = remaining_text.split(link_markdown, 1)
 
-            # Add the text before the link
-            if parts[0]:
-                new_nodes.append(TextNode(parts[0], TextType.TEXT))
+def _split_on_matches(node, pattern, text_type, new_nodes):
+    """Append node's text to new_nodes, split around the matches of pattern.
 
-            # Add the link node
-            new_nodes.append(TextNode(link_text, TextType.LINK, url))
+    Each match (text, url) becomes a node of `text_type`. The text is sliced
+    at the match positions rather than re-split after every match, so the
+    work stays linear in its length however many matches it holds.
+    """
+    text = node.text
+    end = 0
+    for match in pattern.finditer(text):
+        # Add the text before the match
+        if match.start() > end:
+            new_nodes.append(TextNode(text[end : match.start()], TextType.TEXT))
+        new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        end = match.end()
+
+    if end == 0:
+        new_nodes.append(node)
+    elif end < len(text):
+        # Add any remaining text after the last match
+        new_nodes.append(TextNode(text[end:], TextType.TEXT))
+
+
+def split_nodes_reference(old_nodes, definitions):
+    """Resolve reference links and images against a dict of definitions.
+
+    `definitions` maps labels normalized with `block_parser.normalize_label`
+    to URLs, as collected by `block_parser.parse_blocks`. References whose
+    label is not defined are left as text.
+    """
+    new_nodes = []
 
-            # Continue with the remaining text
-            remaining_text = parts[1] if len(parts) > 1 else ""
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT or "[" not in node.text:
+            new_nodes.append(node)
+            continue
 
-        # Add any remaining text after the last link
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        text = node.text
+        end = 0
+        for match in _REFERENCE.finditer(text):
+            bang, link_text, label = match.groups()
+            # [text][] and [text] use the link text as the label
+            key = block_parser.normalize_label(label or link_text)
+            url = definitions.get(key)
+            if url is None:
+                continue
+            if match.start() > end:
+                new_nodes.append(TextNode(text[end : match.start()], TextType.TEXT))
+            text_type = TextType.IMAGE if bang else TextType.LINK
+            new_nodes.append(TextNode(link_text, text_type, url))
+            end = match.end()
+
+        if end == 0:
+            new_nodes.append(node)
+        elif end < len(text):
+            new_nodes.append(TextNode(text[end:], TextType.TEXT))
 
     return new_nodes
 
 
-def text_to_textnodes(text):
+def text_to_textnodes(text, definitions=None):
     # Start with a single TEXT node containing all the text
     nodes = [TextNode(text, TextType.TEXT)]
 
@@ -139,6 +157,10 @@ def text_to_textnodes(text):
     # Split by links
     nodes = split_nodes_link(nodes)
 
+    # Resolve reference links, if the document defines any
+    if definitions:
+        nodes = split_nodes_reference(nodes, definitions)
+
     # Remove any empty TEXT nodes produced by leading/trailing delimiters
     nodes = [n for n in nodes if not (n.text_type == TextType.TEXT and n.text == "")]
 
@@ -151,7 +173,7 @@ def markdown_to_blocks(markdown):
     # Normalize newlines (handle Windows newlines) and ensure we work with a str
     text = str(markdown).replace("\r\n", "\n").replace("\r", "\n")
     # Split on one or more blank lines (lines containing only whitespace)
-    raw_blocks = re.split(r"\n\s*\n", text)
+    raw_blocks = _BLANK_LINES.split(text)
     blocks = []
     for block in raw_blocks:
         stripped = block.strip()
@@ -166,7 +188,7 @@ def block_to_block_type(block):
 
     lines = block.split("\n")
 
-    if re.match(r"^#{1,6} ", block):
+    if _HEADING.match(block):
         return BlockType.HEADING
 
     if block.startswith("```") and block.endswith("```"):
@@ -186,7 +208,7 @@ def block_to_block_type(block):
 
 def _is_ordered_list(lines):
     for index, line in enumerate(lines, start=1):
-        if not re.match(rf"{index}\. ", line):
+        if not line.startswith(f"{index}. "):
             return False
     return bool(lines)
 
@@ -201,74 +223,213 @@ def text_to_children(text):
     return [text_node_to_html_node(n) for n in nodes]
 
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, outline=None, definitions=None):
     """Convert a full markdown document string into a single parent HTMLNode.
 
-    Splits into blocks, converts each block based on its type, and returns
-    a `div` ParentNode containing all block nodes.
+    Builds the node tree through `NodeTreeRenderer`; use `markdown_to_html`
+    when only the HTML string is needed. See `render_blocks` for `outline`
+    and `definitions`.
+
+    Blocks are no longer required to be separated by blank lines: a list or
+    quote marker starts its block on any line that does not continue a
+    paragraph, and an unmarked line right after a list item continues that
+    item ("- a\nfoo" is one item, not a paragraph as it used to be).
+    """
+    return markdown_to_html(markdown, NodeTreeRenderer(), outline, definitions)
+
+
+def markdown_to_html(markdown, renderer=None, outline=None, definitions=None):
+    """Render a markdown document through a renderer and return its result.
+
+    Parses the document into a block tree with `block_parser.parse_blocks`
+    and feeds it to `render_blocks`. The default `HTMLRenderer` writes the
+    HTML string directly, without building HTMLNodes.
+    """
+    if renderer is None:
+        renderer = HTMLRenderer()
+    document = block_parser.parse_blocks(markdown)
+    render_blocks(document, renderer, outline, definitions)
+    return renderer.result()
+
+
+def _render_or_error(markdown):
+    # Module level so executor workers can run it; errors travel as values
+    try:
+        return markdown_to_html(markdown)
+    except Exception as exc:
+        return exc
+
+
+def markdown_to_html_batch(
+    markdowns, executor=None, min_parallel=256, chunksize=64, errors="raise"
+):
+    """Render many markdown documents, returning their HTML in input order.
+
+    Identical documents are rendered once and share the result. When an
+    `executor` (e.g. a `concurrent.futures.ProcessPoolExecutor`, which the
+    caller can keep across batches) is given and there are at least
+    `min_parallel` distinct documents, they are rendered on it in chunks of
+    `chunksize`; smaller batches are rendered in this process, where the
+    pool overhead would outweigh the work.
+
+    Every document is rendered even if some fail. With errors="raise" the
+    first failure (in input order) is then raised; with errors="return" the
+    exception takes the failed document's place in the result list. A
+    failure of the executor itself (e.g. `BrokenProcessPool` when a worker
+    dies) is not a document error: it propagates and no results are
+    returned.
     """
-    blocks = markdown_to_blocks(markdown)
-    children = []
-
-    for block in blocks:
-        btype = block_to_block_type(block)
-
-        if btype == BlockType.HEADING:
-            m = re.match(r"^(#{1,6})\s(.*)$", block)
-            hashes, text = m.group(1), m.group(2)
-            level = len(hashes)
-            children_nodes = text_to_children(text)
-            children.append(ParentNode(tag=f"h{level}", children=children_nodes))
-
-        elif btype == BlockType.PARAGRAPH:
-            children_nodes = text_to_children(block)
-            children.append(ParentNode(tag="p", children=children_nodes))
-
-        elif btype == BlockType.QUOTE:
-            lines = block.split("\n")
-            # Remove leading '>' and optional space from each line
-            inner_text = "\n".join(re.sub(r"^>\s?", "", ln) for ln in lines)
-            children_nodes = text_to_children(inner_text)
-            children.append(ParentNode(tag="blockquote", children=children_nodes))
-
-        elif btype == BlockType.UNORDERED_LIST:
-            lines = block.split("\n")
-            li_nodes = []
-            for ln in lines:
-                # remove leading '- ' from item
-                item_text = re.sub(r"^-\s", "", ln)
-                item_children = text_to_children(item_text)
-                li_nodes.append(ParentNode(tag="li", children=item_children))
-            children.append(ParentNode(tag="ul", children=li_nodes))
-
-        elif btype == BlockType.ORDERED_LIST:
-            lines = block.split("\n")
-            li_nodes = []
-            for ln in lines:
-                item_text = re.sub(r"^\d+\.\s", "", ln)
-                item_children = text_to_children(item_text)
-                li_nodes.append(ParentNode(tag="li", children=item_children))
-            children.append(ParentNode(tag="ol", children=li_nodes))
-
-        elif btype == BlockType.CODE:
-            # Remove the surrounding triple backticks, preserve inner as-is
-            code_text = block
-            if code_text.startswith("```") and code_text.endswith("```"):
-                code_text = code_text[3:-3]
-                # Trim a single leading/trailing newline if present
-                if code_text.startswith("\n"):
-                    code_text = code_text[1:]
-                if code_text.endswith("\n"):
-                    code_text = code_text[:-1]
-            code_node = text_node_to_html_node(TextNode(code_text, TextType.CODE))
-            children.append(ParentNode(tag="pre", children=[code_node]))
+    if errors not in ("raise", "return"):
+        raise ValueError(f"errors must be 'raise' or 'return', not {errors!r}")
+    markdowns = list(markdowns)
+    unique = list(dict.fromkeys(markdowns))
+    if executor is not None and len(unique) >= min_parallel:
+        rendered = executor.map(_render_or_error, unique, chunksize=chunksize)
+    else:
+        rendered = map(_render_or_error, unique)
+    html_by_markdown = dict(zip(unique, rendered))
+    results = [html_by_markdown[markdown] for markdown in markdowns]
+    if errors == "raise":
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+# Marks the end of an open element on the render_blocks stack
+_CLOSE = object()
+
+
+def render_blocks(document, renderer, outline=None, definitions=None):
+    """Emit rendering events for a parsed block tree, wrapped in a `div`.
+
+    Walks the tree with an explicit stack, so deeply nested documents do not
+    hit the recursion limit. Quotes holding only paragraphs and tight list
+    items render their paragraphs inline, without `p` elements.
+
+    If a `toc.Outline` is given, every heading is recorded in it and gets
+    the unique slug it returns as its `id`.
+
+    Reference links resolve against the document's own definitions and then
+    `definitions`, a dict of link definitions shared by every page (see
+    `block_parser.load_definitions`).
+    """
+    references = document.definitions
+    if definitions and references is not definitions:
+        references = ChainMap(references, definitions) if references else definitions
+
+    renderer.open("div")
+    stack = [_CLOSE]
+    stack.extend(reversed(document.children))
+
+    while stack:
+        block = stack.pop()
+
+        if block is _CLOSE:
+            renderer.close()
+            continue
+
+        # Inline text queued for a tight list item
+        if isinstance(block, str):
+            render_inline(block, renderer, references)
+            continue
+
+        kind = block.kind
+
+        if kind == block_parser.PARAGRAPH:
+            renderer.open("p")
+            render_inline(block.text, renderer, references)
+            renderer.close()
+
+        elif kind == block_parser.HEADING:
+            nodes = text_to_textnodes(block.text, references)
+            props = None
+            if outline is not None:
+                text = "".join(n.text for n in nodes if n.text_type != TextType.IMAGE)
+                props = {"id": outline.add(block.level, text)}
+            renderer.open(f"h{block.level}", props)
+            _render_textnodes(nodes, renderer)
+            renderer.close()
+
+        elif kind == block_parser.CODE:
+            renderer.open("pre")
+            _render_code(block, renderer)
+            renderer.close()
+
+        elif kind == block_parser.QUOTE:
+            renderer.open("blockquote")
+            if all(child.kind == block_parser.PARAGRAPH for child in block.children):
+                render_inline(
+                    "\n\n".join(child.text for child in block.children),
+                    renderer,
+                    references,
+                )
+                renderer.close()
+            else:
+                stack.append(_CLOSE)
+                stack.extend(reversed(block.children))
+
+        elif kind == block_parser.LIST:
+            renderer.open("ol" if block.ordered else "ul")
+            stack.append(_CLOSE)
+            stack.extend(reversed(block.children))
+
+        elif kind == block_parser.ITEM:
+            renderer.open("li")
+            stack.append(_CLOSE)
+            for child in reversed(block.children):
+                if not block.loose and child.kind == block_parser.PARAGRAPH:
+                    stack.append(child.text)
+                else:
+                    stack.append(child)
 
         else:
-            # Fallback to paragraph
-            children_nodes = text_to_children(block)
-            children.append(ParentNode(tag="p", children=children_nodes))
+            raise ValueError(f"Unsupported block kind: {kind}")
+
+
+def _render_code(block, renderer):
+    code = block.text
+    if not block.language or not code:
+        # An empty block still gets its (empty) code element
+        props = {"class": f"language-{block.language}"} if block.language else None
+        renderer.leaf("code", code, props)
+        return
+
+    renderer.open("code", {"class": f"language-{block.language}"})
+    tokens = tokenize(block.language, code)
+    if tokens is None:
+        renderer.leaf(None, code)
+    else:
+        for token_type, text in tokens:
+            if token_type is None:
+                renderer.leaf(None, text)
+            else:
+                renderer.leaf("span", text, {"class": f"tok-{token_type}"})
+    renderer.close()
+
+
+def render_inline(text, renderer, definitions=None):
+    """Emit leaf events for inline markdown text."""
+    _render_textnodes(text_to_textnodes(text, definitions), renderer)
+
+
+def _render_textnodes(nodes, renderer):
+    for node in nodes:
+        text_type = node.text_type
+        if text_type == TextType.LINK:
+            renderer.leaf("a", node.text, {"href": node.url})
+        elif text_type == TextType.IMAGE:
+            renderer.leaf("img", "", {"src": node.url, "alt": node.text})
+        else:
+            renderer.leaf(_INLINE_TAGS[text_type], node.text)
+
 
-    return ParentNode(tag="div", children=children)
+_INLINE_TAGS = {
+    TextType.TEXT: None,
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
 
 
 def extract_title(markdown: str) -> str:
@@ -283,7 +444,7 @@ def extract_title(markdown: str) -> str:
 
     # Normalize newlines and iterate lines
     for line in str(markdown).replace("\r\n", "\n").replace("\r", "\n").split("\n"):
-        m = re.match(r"^#\s+(.*)$", line)
+        m = _TITLE.fullmatch(line)
         if m:
             # Strip leading/trailing whitespace from captured title
             return m.group(1).strip()
@@ -0,0 +1,268 @@
+"""Fuzz the markdown pipeline for slow inputs and changed output.
+
+Random documents are built from a seed as lines of well-formed markdown
+(nested list and quote markers, headings, inline markup, links,
+definitions, fenced code, blank lines) with a few lines of raw fragments
+mixed in, so most of them render. Adversarial families repeat one
+troublesome pattern, or nest one a growing number of times. Three checks
+run:
+
+- differential: every random document renders the same through
+  `markdown_to_html_node(md).to_html()` and `markdown_to_html(md)`.
+  Documents that raise are reported separately: they are only a mismatch
+  if the two paths disagree, but they check nothing either;
+- scaling: each adversarial family is rendered at sizes doubling from a
+  start size, and the time per input byte must not grow by more than
+  `max_growth` from the smallest to the largest size, which flags work
+  that is super-linear in the input;
+- snapshot: with --record the outputs of the random corpus are saved, and
+  with --compare a later run (e.g. after an optimization) must reproduce
+  them exactly.
+
+Run from src/: python3 fuzz_markdown.py [--seed N] [--count N]
+    [--record FILE | --compare FILE]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from functions import markdown_to_html, markdown_to_html_node
+
+FRAGMENTS = [
+    "word",
+    "more words",
+    " ",
+    "\n",
+    "\n\n",
+    "  ",
+    "**",
+    "_",
+    "`",
+    "[",
+    "]",
+    "(",
+    ")",
+    "!",
+    "# ",
+    "### ",
+    "- ",
+    "1. ",
+    "2. ",
+    "> ",
+    "```",
+    "```python\n",
+    "[a link](/url)",
+    "![an image](/img.png)",
+    "[text][ref]",
+    "[ref]",
+    "\n[ref]: /defined\n",
+    "<&\"'>",
+    "\t",
+    "é",
+]
+
+# Well-formed pieces of a random line
+INLINE = [
+    "word",
+    "more words",
+    "**bold**",
+    "_italic_",
+    "`code`",
+    "[a link](/url)",
+    "![an image](/img.png)",
+    "[text][ref]",
+    "[ref]",
+    "<&\"'>",
+    "é",
+]
+BLOCK_MARKERS = ["- ", "1. ", "> ", "# ", "### "]
+
+
+def _nested_items_blank_lines(n):
+    return "- " * n + "x" + "\n" * n
+
+
+def _quoted_blank_lines_in_items(n):
+    return "> " + "- " * n + "x" + "\n>" * n
+
+
+def _nested_quotes_and_items(n):
+    return "> - " * n + "x" + "\n" * n + "> " * n + "y"
+
+
+# name -> (pattern repeated n times, or a function building the input for
+# n, definitions passed to the renderer)
+ADVERSARIAL = {
+    "inline links": ("[a](/b) ", None),
+    "inline images": ("![a](/b) ", None),
+    "open brackets": ("[", None),
+    "open image brackets": ("![", None),
+    "unclosed link urls": ("[a](", None),
+    "bracket pairs": ("[a]", None),
+    "nested brackets": ("[[a](b)", None),
+    "image inside link": ("[![a](/b)](/c) ", None),
+    "delimiter runs": ("**_`", None),
+    "unbalanced bold": ("**a ", None),
+    "reference links": ("[a][r] ", {"r": "/r"}),
+    "undefined references": ("[a][x]", {"r": "/r"}),
+    "definitions": ("[r]: /r\n", None),
+    "headings": ("# heading\n", None),
+    "quote lines": ("> quoted\n", None),
+    "list items": ("- item [a](/b)\n", None),
+    "blank lines": ("\n \n", None),
+    "long word": ("a", None),
+    "nested item blanks": (_nested_items_blank_lines, None),
+    "quoted item blanks": (_quoted_blank_lines_in_items, None),
+    "nested quotes, items": (_nested_quotes_and_items, None),
+}
+
+
+def adversarial_input(pattern, n):
+    """Return `pattern` repeated n times, or built by it if it is a function."""
+    return pattern(n) if callable(pattern) else pattern * n
+
+
+def random_line(rng):
+    roll = rng.random()
+    if roll < 0.15:
+        return ""
+    if roll < 0.2:
+        return "[ref]: /defined"
+    if roll < 0.25:
+        return "```python\nx = 1\n\nreturn x\n```"
+    if roll < 0.3:
+        # Raw fragments keep some malformed input in the mix
+        return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 8)))
+    indent = "  " * rng.randrange(4) if rng.random() < 0.3 else ""
+    markers = "".join(rng.choices(BLOCK_MARKERS, k=rng.choice([0, 0, 1, 1, 2, 3])))
+    text = " ".join(rng.choices(INLINE, k=rng.randint(1, 6)))
+    return indent + markers + text
+
+
+def random_document(rng, max_lines=40):
+    return "\n".join(random_line(rng) for _ in range(rng.randint(1, max_lines)))
+
+
+def random_corpus(seed, count):
+    rng = random.Random(seed)
+    return [random_document(rng) for _ in range(count)]
+
+
+class RenderError(str):
+    """The error a render raised, as "Type: message"."""
+
+
+def _render(render, md, definitions=None):
+    try:
+        return render(md, definitions=definitions)
+    except Exception as exc:
+        return RenderError(f"{type(exc).__name__}: {exc}")
+
+
+def render_both(md, definitions=None):
+    """Return (node tree HTML, direct HTML) for md, or the RenderError."""
+    tree = _render(
+        lambda md, **kw: markdown_to_html_node(md, **kw).to_html(), md, definitions
+    )
+    return tree, _render(markdown_to_html, md, definitions)
+
+
+def check_differential(corpus):
+    """
+    Return (mismatches, raised): the documents whose two render paths
+    disagree, and those that raise on either path.
+    """
+    mismatches = []
+    raised = []
+    for md in corpus:
+        tree, direct = render_both(md)
+        if tree != direct:
+            mismatches.append(md)
+        if isinstance(tree, RenderError) or isinstance(direct, RenderError):
+            raised.append(md)
+    return mismatches, raised
+
+
+def time_per_byte(md, definitions=None, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _render(markdown_to_html, md, definitions)
+        best = min(best, time.perf_counter() - start)
+    return best / len(md)
+
+
+def check_scaling(start=2000, doublings=4, families=ADVERSARIAL):
+    """
+    Time each adversarial family at `start` repeats and `doublings` doublings.
+
+    Returns {family: (per-byte times in ns, growth)} where growth is the
+    ratio of the largest size's per-byte time to the smallest's; linear
+    work stays near 1, quadratic work doubles it with every doubling.
+    """
+    results = {}
+    for name, (pattern, definitions) in families.items():
+        times = [
+            time_per_byte(adversarial_input(pattern, start << i), definitions) * 1e9
+            for i in range(doublings + 1)
+        ]
+        results[name] = (times, times[-1] / times[0])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--start", type=int, default=2000)
+    parser.add_argument("--doublings", type=int, default=4)
+    parser.add_argument("--max-growth", type=float, default=2.0)
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument("--record", metavar="FILE")
+    snapshot.add_argument("--compare", metavar="FILE")
+    args = parser.parse_args(argv)
+    failed = False
+
+    corpus = random_corpus(args.seed, args.count)
+    mismatches, raised = check_differential(corpus)
+    print(
+        f"differential: {len(corpus)} documents, {len(mismatches)} mismatches, "
+        f"{len(raised)} raised"
+    )
+    for md in mismatches[:5]:
+        print(f"  {md!r}")
+    for md in raised[:5]:
+        print(f"  raised {render_both(md)[1]}: {md[:100]!r}")
+    failed |= bool(mismatches)
+
+    outputs = [render_both(md)[1] for md in corpus]
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump({"inputs": corpus, "outputs": outputs}, f)
+        print(f"snapshot: recorded {len(corpus)} outputs to {args.record}")
+    elif args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        changed = [
+            md
+            for md, expected in zip(recorded["inputs"], recorded["outputs"])
+            if render_both(md)[1] != expected
+        ]
+        print(f"snapshot: {len(changed)} of {len(recorded['inputs'])} changed")
+        for md in changed[:5]:
+            print(f"  {md!r}")
+        failed |= bool(changed)
+
+    print("scaling: ns per input byte at each doubling")
+    for name, (times, growth) in check_scaling(args.start, args.doublings).items():
+        flag = "  SUPER-LINEAR" if growth > args.max_growth else ""
+        series = " ".join(f"{t:8.1f}" for t in times)
+        print(f"  {name:22s} {series}  x{growth:5.2f}{flag}")
+        failed |= bool(flag)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import re
+
+
+class RegexLexer:
+    """
+    Pure-Python lexer driven by an ordered list of (token type, pattern) rules.
+
+    Rules are combined into one alternation and tried in order at each
+    position; text matching no rule is emitted as a plain (None) token.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._pattern = re.compile(
+            "|".join(f"(?P<t{i}>{pattern})" for i, (_, pattern) in enumerate(rules)),
+            re.MULTILINE,
+        )
+
+    def tokenize(self, code):
+        tokens = []
+        pos = 0
+        for m in self._pattern.finditer(code):
+            if not m.group():
+                continue
+            if m.start() > pos:
+                _append_token(tokens, None, code[pos : m.start()])
+            token_type = self.rules[int(m.lastgroup[1:])][0]
+            _append_token(tokens, token_type, m.group())
+            pos = m.end()
+        if pos < len(code):
+            _append_token(tokens, None, code[pos:])
+        return tokens
+
+
+def _append_token(tokens, token_type, text):
+    # Merge adjacent tokens of the same type to keep the output small
+    if tokens and tokens[-1][0] == token_type:
+        tokens[-1] = (token_type, tokens[-1][1] + text)
+    else:
+        tokens.append((token_type, text))
+
+
+PYTHON_LEXER = RegexLexer(
+    [
+        ("comment", r"#[^\n]*"),
+        ("string", r'[rbfuRBFU]{0,2}(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\')'),
+        ("string", r'[rbfuRBFU]{0,2}(?:"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'),
+        (
+            "number",
+            r"\b(?:0[xXoObB][\da-fA-F_]+|\d[\d_]*(?:\.\d*)?(?:[eE][+-]?\d+)?j?)\b",
+        ),
+        (
+            "keyword",
+            r"\b(?:False|None|True|and|as|assert|async|await|break|class|continue|"
+            r"def|del|elif|else|except|finally|for|from|global|if|import|in|is|"
+            r"lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b",
+        ),
+        (
+            "builtin",
+            r"\b(?:print|len|range|int|str|float|list|dict|set|tuple|open|"
+            r"isinstance|enumerate|zip|sorted|super|self)\b",
+        ),
+        ("name", r"[A-Za-z_]\w*"),
+    ]
+)
+
+# language name -> lexer exposing tokenize(code) -> [(token type or None, text)]
+LEXERS = {}
+
+
+def register_lexer(lexer, *names):
+    """Register a lexer under one or more info-string language names."""
+    for name in names:
+        LEXERS[name.lower()] = lexer
+
+
+register_lexer(PYTHON_LEXER, "python", "py", "python3")
+
+# (language, sha1 of code) -> token list, least recently used first
+_token_cache = {}
+# Entries kept in memory and on disk; old code blocks age out
+TOKEN_CACHE_SIZE = 4096
+
+
+def tokenize(language, code):
+    """Return cached tokens for `code`, or None if no lexer handles `language`."""
+    lexer = LEXERS.get(language.lower())
+    if lexer is None:
+        return None
+    key = (language.lower(), hashlib.sha1(code.encode("utf-8")).hexdigest())
+    tokens = _token_cache.pop(key, None)
+    if tokens is None:
+        tokens = lexer.tokenize(code)
+        if len(_token_cache) >= TOKEN_CACHE_SIZE:
+            del _token_cache[next(iter(_token_cache))]
+    _token_cache[key] = tokens
+    return tokens
+
+
+def load_token_cache(path):
+    """Seed the token cache from a JSON file written by save_token_cache."""
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return
+    # Saved oldest first; entries already used in this process stay newest
+    loaded = {}
+    for language, digest, tokens in entries[-TOKEN_CACHE_SIZE:]:
+        if (language, digest) not in _token_cache:
+            loaded[(language, digest)] = [tuple(token) for token in tokens]
+    loaded.update(_token_cache)
+    _token_cache.clear()
+    _token_cache.update(list(loaded.items())[-TOKEN_CACHE_SIZE:])
+
+
+def save_token_cache(path):
+    """Persist the token cache so later builds skip re-lexing unchanged code.
+
+    At most TOKEN_CACHE_SIZE entries are kept, dropping the least recently
+    used, so code removed from the site does not stay in the file forever.
+    """
+    # Only builds save the cache; rendering alone need not load output
+    from output import write_atomic
+
+    entries = [
+        [language, digest, tokens] for (language, digest), tokens in _token_cache.items()
+    ]
+    write_atomic(path, json.dumps(entries).encode("utf-8"))
@@ -1,4 +1,3 @@
-import json
 from textnode import TextNode, TextType
 
 
@@ -9,30 +8,34 @@ class HTMLNode:
         self.children = children
         self.props = props
 
+    @property
+    def props(self):
+        return self._props
+
+    @props.setter
+    def props(self, props):
+        self._props = props
+        # Snapshot of the dict items the attribute string was built from
+        self._attributes_items = None
+        self._attributes = ""
+        if props and not isinstance(props, dict):
+            # Strings cannot change, so they are parsed (and checked) once
+            self._attributes = _json_props_to_attributes(props)
+
     def to_html(self):
         raise NotImplementedError("NotImplementedError")
 
     def props_to_html(self):
-        if not self.props:
-            return ""
-
-        # If props is already a dictionary, use it
-        if isinstance(self.props, dict):
-            props_dict = self.props
-        else:
-            # Clean and attempt to parse props as JSON
-            try:
-                cleaned_props = "".join(
-                    line.strip() for line in self.props.splitlines()
-                )
-                props_dict = json.loads(cleaned_props)
-            except json.JSONDecodeError as exc:
-                raise ValueError(
-                    "Invalid props format. Expected a JSON string."
-                ) from exc
-
-        # Convert dictionary to HTML attributes
-        return " " + " ".join(f'{key}="{value}"' for key, value in props_dict.items())
+        props = self._props
+        if not isinstance(props, dict):
+            return self._attributes
+        # The string is only rebuilt when the dict changed since the last
+        # call, including changes made to it in place
+        items = tuple(props.items())
+        if items != self._attributes_items:
+            self._attributes = props_to_attributes(props)
+            self._attributes_items = items
+        return self._attributes
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
@@ -48,15 +51,73 @@ class HTMLNode:
         )
 
 
+# Attribute name -> opening of its serialized form, for the common names
+_ATTRIBUTE_PREFIXES = {
+    name: f' {name}="' for name in ("href", "src", "alt", "class", "title")
+}
+
+
+def escape_text(text):
+    """Escape &, < and > for use as HTML text content."""
+    # Checking first keeps the common case (nothing to escape) to plain scans
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value):
+    """Escape a value for use inside a double-quoted HTML attribute."""
+    value = escape_text(str(value))
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    return value
+
+
+def props_to_attributes(props):
+    """Convert a props dictionary to an escaped HTML attribute string
+    (with leading space)."""
+    if not props:
+        return ""
+    parts = []
+    for key, value in props.items():
+        prefix = _ATTRIBUTE_PREFIXES.get(key)
+        if prefix is None:
+            prefix = f' {key}="'
+        parts.append(prefix + escape_attribute(value) + '"')
+    return "".join(parts)
+
+
+def _json_props_to_attributes(props):
+    # Clean and attempt to parse props as JSON (rare, so json is loaded here)
+    import json
+
+    try:
+        cleaned_props = "".join(line.strip() for line in props.splitlines())
+        props_dict = json.loads(cleaned_props)
+    except json.JSONDecodeError as exc:
+        raise ValueError("Invalid props format. Expected a JSON string.") from exc
+    return props_to_attributes(props_dict)
+
+
 class LeafNode(HTMLNode):
     # Self-closing tags that don't require a value
     SELF_CLOSING_TAGS = {"img", "br", "hr", "input", "meta", "link"}
+    # Tags that may be empty, such as the code of an empty code block
+    EMPTY_TAGS = {"code"}
 
     def __init__(self, tag=None, value=None, children=None, props=None):
         if children is not None:
             raise ValueError("LeafNode does not allow 'children'.")
-        # Allow empty value for self-closing tags
-        if (value is None or value == "") and tag not in self.SELF_CLOSING_TAGS:
+        # Allow empty value for self-closing and empty-allowed tags
+        if (
+            (value is None or value == "")
+            and tag not in self.SELF_CLOSING_TAGS
+            and tag not in self.EMPTY_TAGS
+        ):
             raise ValueError("All leaf nodes must have a value.")
         super().__init__(tag=tag, value=value, children=None, props=props or {})
 
@@ -65,13 +126,15 @@ class LeafNode(HTMLNode):
         if self.tag in self.SELF_CLOSING_TAGS:
             return f"<{self.tag}{self.props_to_html()} />"
 
-        if not self.value:
+        if not self.value and self.tag not in self.EMPTY_TAGS:
             raise ValueError("All leaf nodes must have a value.")
 
         if self.tag is None or self.tag == "":
-            return self.value
+            return escape_text(self.value)
 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        attributes = self.props_to_html()
+        value = escape_text(self.value) if self.value else ""
+        return f"<{self.tag}{attributes}>{value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
@@ -1,12 +1,150 @@
+from __future__ import annotations
+
+import argparse
 import os
 import sys
-from functions import markdown_to_html_node, extract_title
-from copy_static import copy_static_to_public
+import time
+
+# Everything else is imported where it is used, so `--help`, `--rebuild` and
+# builds with nothing to regenerate skip loading the markdown pipeline. That
+# includes typing (several ms); annotations are strings, read by type checkers.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Iterator
+
+    from depgraph import DependencyGraph
+    from output import OutputWriter
+    from templates import Template
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument(
+        "basepath", nargs="?", default="/", help="Base path for URLs (default: /)"
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="Render only shard i of N into the shards directory",
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="N",
+        type=int,
+        help="Assemble static assets and the outputs of shards 1/N to N/N into "
+        "the public directory",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the dependency graph and regenerate every page",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Also log an event per page and copied file",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only log warnings")
+    parser.add_argument(
+        "--log",
+        metavar="FILE",
+        help="Append JSON-lines build events to FILE instead of stdout",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="Write build metrics to FILE in the Prometheus text format",
+    )
+    parser.add_argument(
+        "--bundle",
+        metavar="FILE",
+        help="Write the site into (or with --serve, serve it from) a .zip, .tar "
+        "or .tar.gz file instead of docs/",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="[HOST:]PORT",
+        help="Serve the built site from memory over HTTP",
+    )
+    parser.add_argument(
+        "--preview",
+        metavar="[HOST:]PORT",
+        help="Serve pages over HTTP, rendering each one when first requested",
+    )
+    parser.add_argument(
+        "--daemon",
+        metavar="SOCKET",
+        help="Build, then keep serving incremental rebuilds on a Unix socket",
+    )
+    parser.add_argument(
+        "--rebuild",
+        metavar="SOCKET",
+        help="Ask a running build daemon to rebuild and print its report",
+    )
+    args = parser.parse_args(argv)
+    modes = [
+        args.shard,
+        args.merge,
+        args.daemon,
+        args.rebuild,
+        args.serve,
+        args.preview,
+    ]
+    if sum(bool(mode) for mode in modes) > 1:
+        parser.error(
+            "--shard, --merge, --daemon, --rebuild, --serve and --preview are "
+            "mutually exclusive"
+        )
+    if args.merge is not None and args.merge < 1:
+        parser.error("--merge expects a shard count of at least 1")
+    if args.bundle and (args.shard or args.daemon or args.rebuild or args.preview):
+        parser.error("--bundle can only be used for a full build, --merge or --serve")
+    for name in ("serve", "preview"):
+        if getattr(args, name):
+            from server import parse_address
+
+            try:
+                setattr(args, name, parse_address(getattr(args, name)))
+            except ValueError as exc:
+                parser.error(str(exc))
+    if args.shard:
+        from sharding import parse_shard
+
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as exc:
+            parser.error(str(exc))
+    return args
+
+
+def _error(message):
+    """Exit with `message` like argparse, for errors found while running."""
+    sys.exit(f"{os.path.basename(sys.argv[0])}: error: {message}")
 
 
-def main():
-    # Get basepath from CLI argument, default to "/"
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    import events
+
+    verbosity = events.QUIET if args.quiet else events.NORMAL + args.verbose
+    log_file = open(args.log, "a", encoding="utf-8") if args.log else None
+    log = events.configure(log_file, verbosity)
+    try:
+        _run(args)
+    finally:
+        if args.metrics:
+            log.write_metrics(args.metrics)
+        if log_file is not None:
+            log_file.close()
+
+
+def _run(args):
+    import events
+
+    basepath = args.basepath
 
     # Get the project root directory (parent of src/)
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -16,21 +154,259 @@ def main():
     static_path = os.path.join(project_root, "static")
     # public_path = os.path.join(project_root, "public")
     public_path = os.path.join(project_root, "docs")
-
-    # 1) Delete anything in public (handled inside copy function)
-    # 2) Copy all static files from static to public
-    print("Copying static files to public directory...")
-    copy_static_to_public(static_path, public_path)
-    print("Static copy complete!")
-
-    # 3) Generate pages recursively from content directory
+    shards_path = os.path.join(project_root, "shards")
     content_dir = os.path.join(project_root, "content")
     template_html = os.path.join(project_root, "template.html")
-    generate_pages_recursive(content_dir, template_html, public_path, basepath)
+    cache_dir = os.path.join(project_root, ".cache")
+    token_cache_path = os.path.join(cache_dir, "highlight.json")
+    manifest_path = os.path.join(cache_dir, "output-manifest.json")
+    graph_path = os.path.join(cache_dir, "depgraph.json")
+    staging_dir = os.path.join(cache_dir, "staging")
+    links_path = os.path.join(project_root, "links.md")
+
+    if args.shard:
+        from sharding import partition_pages, reset_shard_dir
+        from templates import section_template
+
+        index, count = args.shard
+        definitions = _shared_definitions(links_path)
+        pages = find_pages(content_dir, public_path)
+        shard_pages = partition_pages(pages, count)[index - 1]
+        out_dir = reset_shard_dir(shards_path, index, count)
+        events.emit("shard", index=index, count=count, pages=len(shard_pages))
+        for from_path, dest_path in shard_pages:
+            rel_dest = os.path.relpath(dest_path, public_path)
+            page_template = section_template(content_dir, from_path, template_html)
+            generate_page(
+                from_path,
+                page_template,
+                os.path.join(out_dir, rel_dest),
+                basepath,
+                definitions=definitions,
+            )
+        return
+
+    if args.merge:
+        from output import BundleWriter, OutputWriter
+        from sharding import merge_shards
+
+        try:
+            if args.bundle:
+                with BundleWriter(args.bundle, public_path) as writer:
+                    merge_shards(
+                        shards_path, static_path, public_path, writer, args.merge
+                    )
+                return
+            writer = OutputWriter(manifest_path)
+            merge_shards(shards_path, static_path, public_path, writer, args.merge)
+        except ValueError as exc:
+            # e.g. a missing shard; a bundle has already been discarded
+            _error(str(exc))
+        writer.save_manifest()
+        return
+
+    if args.rebuild:
+        import json
+        from daemon import send_request
+
+        try:
+            response = send_request(args.rebuild)
+        except OSError as exc:
+            _error(f"no build daemon at {args.rebuild}: {exc.strerror or exc}")
+        print(json.dumps(response))
+        return
+
+    if args.serve:
+        from server import SiteFiles, serve
+
+        if args.bundle:
+            site = SiteFiles.from_bundle(args.bundle)
+        else:
+            site = SiteFiles.from_directory(public_path)
+        serve(args.serve, site)
+        return
+
+    if args.preview:
+        from preview import PreviewSite
+        from server import serve
+
+        site = PreviewSite(
+            content_dir, template_html, static_path, basepath, links_path=links_path
+        )
+        serve(args.preview, site)
+        return
+
+    if args.daemon:
+        from daemon import SiteBuilder, serve
+
+        builder = SiteBuilder(
+            content_dir, template_html, static_path, public_path, basepath, links_path
+        )
+        serve(args.daemon, builder)
+        return
+
+    import shutil
+    from copy_static import copy_static_to_public
+    from depgraph import DependencyGraph
+    from output import (
+        BundleWriter,
+        OutputWriter,
+        mirror_tree,
+        remove_set_aside,
+        replace_directory,
+    )
+
+    # Link reference definitions shared by every page, parsed once per build
+    definitions = _shared_definitions(links_path)
+
+    if args.bundle:
+        # Everything streams into one archive and docs/ is left untouched;
+        # the bundle only replaces the previous one if the build succeeds
+        with BundleWriter(args.bundle, public_path) as writer:
+            with events.stage("static"):
+                copy_static_to_public(static_path, public_path, writer=writer)
+            with events.stage("pages"):
+                generate_pages_recursive(
+                    content_dir,
+                    template_html,
+                    public_path,
+                    basepath,
+                    writer,
+                    token_cache_path=token_cache_path,
+                    definitions=definitions,
+                )
+        events.emit("summary", written=writer.written, bundle=args.bundle)
+        return
+
+    # The site is built in a staging mirror of public (hard links, so
+    # unchanged outputs cost nothing) that replaces it only on success,
+    # together with a checkpoint of the dependency graph that only replaces
+    # the published one then. A staging directory left by an interrupted
+    # build is resumed instead: pages recorded in its last checkpoint are
+    # not rendered again.
+    staging_path = os.path.join(staging_dir, "site")
+    checkpoint_path = os.path.join(staging_dir, "depgraph.json")
+    remove_set_aside(cache_dir)
+    resumed = os.path.isdir(staging_path)
+    if resumed:
+        events.emit("resume", path=staging_dir)
+    else:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        mirror_tree(public_path, staging_path)
+    if not os.path.exists(checkpoint_path) and os.path.exists(graph_path):
+        shutil.copyfile(graph_path, checkpoint_path)
+
+    # Outputs whose bytes are unchanged keep their mtime, so rsync/CDN
+    # uploads only see real changes
+    writer = OutputWriter(manifest_path)
+
+    # 1) Copy all static files from static to staging
+    with events.stage("static"):
+        copy_static_to_public(static_path, staging_path, writer=writer)
+
+    # 2) Generate pages whose inputs changed since the last build
+    with events.stage("pages"):
+        # Every page depends on the shared definitions
+        graph = DependencyGraph(
+            content_dir,
+            static_path,
+            checkpoint_path,
+            {"basepath": basepath},
+            template_html,
+            shared_inputs=[links_path],
+        )
+        if args.full:
+            graph.pages.clear()
+        generate_pages_recursive(
+            content_dir,
+            template_html,
+            staging_path,
+            basepath,
+            writer,
+            graph,
+            token_cache_path,
+            definitions,
+            checkpoint_interval=30.0,
+        )
+        graph.save()
+
+    # 3) Delete anything in staging that this build did not produce
+    with events.stage("prune"):
+        removed = writer.prune(staging_path)
+        for path in removed:
+            events.emit("removed", path=path)
+        writer.save_manifest()
+
+    # 4) Put the finished site in place of public, then publish its graph
+    with events.stage("swap"):
+        replace_directory(staging_path, public_path, cache_dir)
+        os.replace(checkpoint_path, graph_path)
+        os.rmdir(staging_dir)
+    events.emit(
+        "summary",
+        written=writer.written,
+        unchanged=writer.skipped,
+        removed=len(removed),
+        resumed=resumed,
+    )
+
+
+def _shared_definitions(links_path):
+    """Parse the link definitions shared by every page, if the site has any."""
+    if not os.path.isfile(links_path):
+        return {}
+    from block_parser import load_definitions
+
+    return load_definitions(links_path)
+
+
+def _sorted_entries(path):
+    with os.scandir(path) as entries:
+        return iter(sorted(entries, key=lambda entry: entry.name))
+
+
+def iter_pages(
+    dir_path_content: str, dest_dir_path: str
+) -> Iterator[tuple[str, str]]:
+    """
+    Yield (markdown source, HTML destination) pairs, depth first by name.
+
+    Uses os.scandir with an explicit stack instead of recursion, so deep
+    trees cannot hit the recursion limit and only the directories on the
+    current path are held in memory. Destinations mirror the content
+    directory structure under dest_dir_path.
+    """
+    stack = [(_sorted_entries(dir_path_content), dest_dir_path)]
+    while stack:
+        entries, dest_dir = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+        elif entry.is_file():
+            if entry.name.endswith(".md"):
+                html_filename = entry.name[:-3] + ".html"
+                yield entry.path, os.path.join(dest_dir, html_filename)
+        elif entry.is_dir():
+            dest_subdir = os.path.join(dest_dir, entry.name)
+            stack.append((_sorted_entries(entry.path), dest_subdir))
+
+
+def find_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    """Collect every (markdown source, HTML destination) pair from `iter_pages`."""
+    return list(iter_pages(dir_path_content, dest_dir_path))
 
 
 def generate_pages_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str = "/"
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str = "/",
+    writer: OutputWriter | None = None,
+    graph: DependencyGraph | None = None,
+    token_cache_path: str | None = None,
+    definitions: dict[str, str] | None = None,
+    checkpoint_interval: float | None = None,
 ) -> None:
     """
     Recursively crawl the content directory and generate HTML pages for all markdown files.
@@ -41,57 +417,151 @@ def generate_pages_recursive(
         template_path: Path to the HTML template file
         dest_dir_path: Path to the destination directory for generated HTML
         basepath: Base path for URLs (default: "/")
+        writer: Optional OutputWriter shared across pages (default: a new one per page)
+        graph: Optional DependencyGraph; pages it does not report as stale are
+            skipped (and kept in writer), generated pages are recorded in it
+        token_cache_path: Optional highlight token cache, loaded before the
+            first page is generated and saved afterwards
+        definitions: Optional link reference definitions shared by every page
+        checkpoint_interval: With a graph, save it (and writer's manifest) at
+            most this many seconds apart while rendering, so an interrupted
+            build can resume without rendering the pages recorded so far
+
+    Pages in a section (content/<section>/...) use templates/<section>.html
+    instead of template_path when it exists.
     """
-    # Iterate through all entries in the content directory
-    for entry in os.listdir(dir_path_content):
-        entry_path = os.path.join(dir_path_content, entry)
+    # Pages are streamed from disk; across the whole site only source paths
+    # (and the graph's compact records) are kept
+    import events
+
+    stale = None
+    if graph is not None:
+        stale = graph.stale_pages(iter_pages(dir_path_content, dest_dir_path))
+        events.emit("stale", pages=len(stale))
 
-        if os.path.isfile(entry_path):
-            # If it's a markdown file, generate HTML
-            if entry.endswith(".md"):
-                # Convert .md extension to .html
-                html_filename = entry[:-3] + ".html"
-                dest_path = os.path.join(dest_dir_path, html_filename)
-                generate_page(entry_path, template_path, dest_path, basepath)
+    rendering = stale is None or bool(stale)
+    if rendering:
+        from highlight import load_token_cache, save_token_cache
+        from templates import section_template
 
-        elif os.path.isdir(entry_path):
-            # If it's a directory, recursively process it
-            dest_subdir = os.path.join(dest_dir_path, entry)
-            generate_pages_recursive(entry_path, template_path, dest_subdir, basepath)
+        if token_cache_path:
+            load_token_cache(token_cache_path)
+
+    last_checkpoint = time.monotonic()
+    sources = set()
+    for from_path, dest_path in iter_pages(dir_path_content, dest_dir_path):
+        if stale is not None:
+            sources.add(from_path)
+            if from_path not in stale:
+                if writer is not None:
+                    writer.keep(dest_path)
+                events.emit(
+                    "page", events.VERBOSE, source=from_path, result="cached"
+                )
+                continue
+        page_template = section_template(dir_path_content, from_path, template_path)
+        generate_page(
+            from_path, page_template, dest_path, basepath, writer, graph, definitions
+        )
+        if (
+            checkpoint_interval is not None
+            and graph is not None
+            and time.monotonic() - last_checkpoint >= checkpoint_interval
+        ):
+            graph.save()
+            if writer is not None:
+                writer.save_manifest()
+            events.emit("checkpoint", events.VERBOSE, pages=len(graph.pages))
+            last_checkpoint = time.monotonic()
+
+    if graph is not None:
+        graph.forget_missing(sources)
+    if rendering and token_cache_path:
+        save_token_cache(token_cache_path)
+
+
+def render_page(
+    template: Template | str,
+    title: str,
+    content_html: str,
+    basepath: str = "/",
+    toc_html: str = "",
+) -> str:
+    """Fill the template placeholders and rewrite root-relative URLs to basepath."""
+    from htmlnode import escape_text
+    from templates import template_from_string
+
+    if isinstance(template, str):
+        template = template_from_string(template)
+
+    # Replace placeholders
+    page = template.render(
+        {"Title": escape_text(title), "Content": content_html, "TOC": toc_html}
+    )
+
+    # Replace href and src URLs with basepath
+    page = page.replace('href="/', f'href="{basepath}')
+    page = page.replace('src="/', f'src="{basepath}')
+    return page
 
 
 def generate_page(
-    from_path: str, template_path: str, dest_path: str, basepath: str = "/"
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    basepath: str = "/",
+    writer: OutputWriter | None = None,
+    graph: DependencyGraph | None = None,
+    definitions: dict[str, str] | None = None,
 ) -> None:
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    import events
+    from functions import extract_title, markdown_to_html
+    from output import OutputWriter
+    from renderer import HTMLRenderer, RecordingRenderer
+    from templates import load_template
+    from toc import Outline
+
+    start = time.perf_counter()
     # Read markdown
     with open(from_path, "r", encoding="utf-8") as f:
         md = f.read()
+        bytes_in = os.fstat(f.fileno()).st_size
 
-    # Read template
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
+    # Compiled once per build and shared by every page using it
+    template = load_template(template_path)
 
-    # Convert markdown to HTML string
-    html_root = markdown_to_html_node(md)
-    html_str = html_root.to_html()
+    # Convert markdown to HTML string, collecting heading anchors for the TOC
+    outline = Outline()
+    recorder = RecordingRenderer(HTMLRenderer())
+    html_str = markdown_to_html(md, recorder, outline, definitions)
 
     # Extract title
     title = extract_title(md)
 
-    # Replace placeholders
-    page = template.replace("{{ Title }}", title).replace("{{ Content }}", html_str)
+    page = render_page(template, title, html_str, basepath, outline.to_html())
+    data = page.encode("utf-8")
 
-    # Replace href and src URLs with basepath
-    page = page.replace('href="/', f'href="{basepath}')
-    page = page.replace('src="/', f'src="{basepath}')
+    # Write output atomically, skipping it if the file is already identical
+    if writer is None:
+        writer = OutputWriter()
+    written = writer.write(dest_path, data)
 
-    # Ensure destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if graph is not None:
+        graph.record_page(
+            from_path, dest_path, title, template, recorder.hrefs, recorder.srcs
+        )
 
-    # Write output
-    with open(dest_path, "w", encoding="utf-8") as f:
-        f.write(page)
+    events.emit(
+        "page",
+        events.VERBOSE,
+        source=from_path,
+        dest=dest_path,
+        template=template_path,
+        result="written" if written else "unchanged",
+        duration_ms=events.elapsed_ms(start),
+        bytes_in=bytes_in,
+        bytes_out=len(data),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,340 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+
+def _create_temp(directory: str) -> tuple[int, str]:
+    """Create and open a new `.tmp-*` file in `directory`.
+
+    Unlike mkstemp (always 0600) the file is created with mode 0666, so the
+    process umask gives it the same mode as any normally created file.
+    """
+    while True:
+        path = os.path.join(directory, ".tmp-" + os.urandom(6).hex())
+        try:
+            return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666), path
+        except FileExistsError:
+            continue
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write bytes to a temp file next to `path` and rename it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = None
+    fd, tmp_path = _create_temp(directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def mirror_tree(source: str, dest: str) -> None:
+    """Recreate the files under `source` in `dest` as hard links.
+
+    Files are copied instead where linking fails (e.g. across filesystems).
+    Outputs are always replaced through `write_atomic`, never rewritten in
+    place, so building into the mirror leaves `source` untouched.
+    """
+    os.makedirs(dest, exist_ok=True)
+    for dirpath, _, filenames in os.walk(source):
+        target_dir = os.path.join(dest, os.path.relpath(dirpath, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in filenames:
+            source_path = os.path.join(dirpath, name)
+            dest_path = os.path.join(target_dir, name)
+            try:
+                os.link(source_path, dest_path)
+            except OSError:
+                shutil.copy2(source_path, dest_path)
+
+
+def replace_directory(source: str, dest: str, aside_dir: str) -> None:
+    """Move the directory `source` to `dest`, replacing whatever is there.
+
+    The old `dest` is renamed into a ".old-*" directory in `aside_dir` (on
+    the same filesystem) and only deleted once `source` is in place, so
+    `dest` is briefly missing but never holds a partial tree. Use
+    `remove_set_aside` to delete any left there by an interrupted call.
+    """
+    old = None
+    if os.path.lexists(dest):
+        os.makedirs(aside_dir, exist_ok=True)
+        old = tempfile.mkdtemp(dir=aside_dir, prefix=".old-")
+        os.replace(dest, old)
+    os.replace(source, dest)
+    if old is not None:
+        shutil.rmtree(old)
+
+
+def remove_set_aside(aside_dir: str) -> None:
+    """Delete the ".old-*" directories `replace_directory` left in aside_dir."""
+    if not os.path.isdir(aside_dir):
+        return
+    for name in os.listdir(aside_dir):
+        if name.startswith(".old-"):
+            shutil.rmtree(os.path.join(aside_dir, name))
+
+
+class OutputWriter:
+    """
+    Writes build outputs, skipping files whose bytes are already in place.
+
+    Each write is hashed and compared against the optional manifest (when the
+    file's size and mtime still match what was recorded) or else against the
+    file on disk. Changed files are written atomically via `write_atomic`.
+    Every path handled is remembered so stale outputs can be pruned.
+    """
+
+    def __init__(self, manifest_path=None):
+        self.manifest_path = manifest_path
+        # absolute output path -> [sha256, size, mtime_ns]
+        self.manifest = {}
+        self.paths = set()
+        self.written = 0
+        self.skipped = 0
+        if manifest_path and os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.manifest = {}
+
+    def write(self, path: str, data) -> bool:
+        """Write str or bytes to `path`; return False if it was already identical."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        path = os.path.abspath(path)
+        self.paths.add(path)
+        digest = hashlib.sha256(data).hexdigest()
+
+        if self._is_current(path, digest, len(data)):
+            self.skipped += 1
+            return False
+
+        write_atomic(path, data)
+        self._record(path, digest)
+        self.written += 1
+        return True
+
+    def keep(self, path: str) -> None:
+        """Mark an existing output as produced by this build without writing it."""
+        self.paths.add(os.path.abspath(path))
+
+    def copy(self, source_path: str, dest_path: str) -> bool:
+        """Copy a file through `write`, keeping the source's metadata when written."""
+        with open(source_path, "rb") as f:
+            data = f.read()
+        changed = self.write(dest_path, data)
+        if changed:
+            # copystat changes the mtime, so refresh the manifest entry
+            shutil.copystat(source_path, dest_path)
+            path = os.path.abspath(dest_path)
+            self._record(path, self.manifest[path][0])
+        return changed
+
+    def prune(self, root: str) -> list[str]:
+        """Delete files under `root` not handled by this writer; return them."""
+        removed = []
+        for dirpath, _, filenames in os.walk(root, topdown=False):
+            for name in filenames:
+                path = os.path.abspath(os.path.join(dirpath, name))
+                if path not in self.paths:
+                    os.remove(path)
+                    self.manifest.pop(path, None)
+                    removed.append(path)
+            if dirpath != root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        return removed
+
+    def save_manifest(self) -> None:
+        if not self.manifest_path:
+            return
+        data = json.dumps(self.manifest, sort_keys=True).encode("utf-8")
+        write_atomic(self.manifest_path, data)
+
+    def _is_current(self, path, digest, size):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if st.st_size != size:
+            return False
+
+        recorded = self.manifest.get(path)
+        if recorded and recorded[1:] == [st.st_size, st.st_mtime_ns]:
+            return recorded[0] == digest
+
+        with open(path, "rb") as f:
+            current = hashlib.sha256(f.read()).hexdigest()
+        if current == digest:
+            self._record(path, digest)
+            return True
+        return False
+
+    def _record(self, path, digest):
+        st = os.stat(path)
+        self.manifest[path] = [digest, st.st_size, st.st_mtime_ns]
+
+
+class BundleWriter:
+    """
+    Writes build outputs into a single archive instead of a directory.
+
+    Has the same interface as `OutputWriter`, so pages and static assets
+    stream straight into the bundle. Paths are stored relative to `root`
+    (the directory the site would otherwise be written to). The format
+    follows the file name: .zip (deflated, with its own central directory),
+    .tar, or .tar.gz/.tgz. A plain .tar also gets `<bundle>.index.json`
+    mapping each member to the [offset, size] of its data, so single files
+    can be read without scanning the archive. The bundle is built in a temp
+    file and renamed into place by `close` (or on leaving a `with` block).
+    """
+
+    def __init__(self, bundle_path: str, root: str):
+        self.bundle_path = bundle_path
+        self.root = os.path.abspath(root)
+        self.paths = set()
+        self.written = 0
+        self.skipped = 0
+        # member name -> [data offset, size], plain tar only
+        self.index = None
+        self._mtime = int(time.time())
+
+        directory = os.path.dirname(os.path.abspath(bundle_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = _create_temp(directory)
+        os.close(fd)
+
+        name = bundle_path.lower()
+        if name.endswith(".zip"):
+            import zipfile
+
+            self._zip = zipfile.ZipFile(self._tmp_path, "w", zipfile.ZIP_DEFLATED)
+            self._tar = None
+        elif name.endswith((".tar", ".tar.gz", ".tgz")):
+            import tarfile
+
+            mode = "w" if name.endswith(".tar") else "w:gz"
+            self._tar = tarfile.open(self._tmp_path, mode)
+            self._zip = None
+            if mode == "w":
+                self.index = {}
+        else:
+            os.remove(self._tmp_path)
+            raise ValueError(f"Unsupported bundle format: {bundle_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, path: str, data) -> bool:
+        """Add str or bytes to the bundle as `path`; always returns True."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        name = self._member_name(path)
+        if self._zip is not None:
+            info = self._zip_info(name, self._mtime, 0o644)
+            self._zip.writestr(info, data)
+        else:
+            import tarfile
+
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = self._mtime
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+            self._index_last(name, len(data))
+        self.written += 1
+        return True
+
+    def keep(self, path: str) -> None:
+        raise ValueError("Bundles are always built from scratch")
+
+    def copy(self, source_path: str, dest_path: str) -> bool:
+        """Stream a file into the bundle, keeping its mtime and mode."""
+        name = self._member_name(dest_path)
+        if self._zip is not None:
+            st = os.stat(source_path)
+            info = self._zip_info(name, st.st_mtime, st.st_mode & 0o777)
+            with open(source_path, "rb") as src, self._zip.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            info = self._tar.gettarinfo(source_path, arcname=name)
+            with open(source_path, "rb") as src:
+                self._tar.addfile(info, src)
+            self._index_last(name, info.size)
+        self.written += 1
+        return True
+
+    def prune(self, root: str) -> list[str]:
+        # Nothing stale can exist in a freshly built bundle
+        return []
+
+    def save_manifest(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Finish the archive and move it (and its index) into place."""
+        archive = self._zip if self._zip is not None else self._tar
+        archive.close()
+        if self.index is not None:
+            data = json.dumps(self.index, sort_keys=True).encode("utf-8")
+            write_atomic(self.bundle_path + ".index.json", data)
+        os.replace(self._tmp_path, self.bundle_path)
+
+    def abort(self) -> None:
+        """Discard the partially written bundle."""
+        archive = self._zip if self._zip is not None else self._tar
+        try:
+            archive.close()
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def _member_name(self, path):
+        path = os.path.abspath(path)
+        rel = os.path.relpath(path, self.root)
+        if rel == os.curdir or rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            raise ValueError(f"{path} is outside the bundle root {self.root}")
+        if path in self.paths:
+            raise ValueError(f"{path} was already added to the bundle")
+        self.paths.add(path)
+        return rel.replace(os.sep, "/")
+
+    @staticmethod
+    def _zip_info(name, mtime, mode):
+        import zipfile
+
+        # Zip timestamps cannot predate 1980
+        date_time = time.localtime(max(mtime, 315532800))[:6]
+        info = zipfile.ZipInfo(name, date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = (0o100000 | mode) << 16
+        return info
+
+    def _index_last(self, name, size):
+        # The tar offset is now just past the member's padded data blocks
+        if self.index is not None:
+            import tarfile
+
+            padded = -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            self.index[name] = [self._tar.offset - padded, size]
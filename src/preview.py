@@ -0,0 +1,211 @@
+import os
+import posixpath
+import threading
+import time
+from collections import OrderedDict
+import events
+from server import StaticFile
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class _Flight:
+    """A render in progress that other requests for the same file wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PreviewSite:
+    """
+    Renders pages when they are first requested instead of building the site.
+
+    Request paths map to sources the way a build maps sources to outputs
+    ("/blog/" is content/blog/index.md, "/about.html" is content/about.md)
+    and anything else is looked up in static/. Results are kept in an LRU
+    of at most `max_files` entries, each valid while the stat keys (mtime,
+    size) of its source and, for pages, every template file it used are
+    unchanged. Concurrent requests for a file that is being rendered wait
+    for that render instead of starting another one. Link definitions
+    shared by every page are read from `links_path`, which is a dependency
+    of every page.
+
+    Implements `lookup` like `server.SiteFiles`, so `server.SiteServer` can
+    serve it.
+    """
+
+    def __init__(
+        self,
+        content_dir,
+        template_path,
+        static_dir,
+        basepath="/",
+        max_files=1024,
+        links_path=None,
+    ):
+        self.content_dir = os.path.abspath(content_dir)
+        self.template_path = template_path
+        self.static_dir = os.path.abspath(static_dir)
+        self.basepath = basepath
+        self.max_files = max_files
+        self.links_path = links_path
+        self._definitions_file = None
+        if links_path:
+            from block_parser import DefinitionsFile
+
+            self._definitions_file = DefinitionsFile(links_path)
+        self.renders = 0
+        self.hits = 0
+        # source path -> (StaticFile, {dependency path: stat key})
+        self._cache = OrderedDict()
+        # source path -> _Flight
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, url_path: str):
+        """Return (StaticFile or None, redirect location or None) for a path.
+
+        Pages link to each other under `basepath`, so only paths below it
+        are served, with the prefix removed.
+        """
+        prefix = self.basepath.rstrip("/")
+        if prefix:
+            if url_path == prefix:
+                return None, prefix + "/"
+            if not url_path.startswith(prefix + "/"):
+                return None, None
+            url_path = url_path[len(prefix) :]
+        rel = _relative(url_path)
+        if rel is None:
+            return None, None
+
+        if rel == "" or url_path.endswith("/"):
+            source = self._content_path(rel, "index.md")
+        elif rel.endswith(".html"):
+            source = self._content_path(rel[:-5] + ".md")
+        else:
+            source = None
+            if os.path.isfile(self._content_path(rel, "index.md")):
+                return None, prefix + url_path + "/"
+
+        if source is not None and os.path.isfile(source):
+            return self._get(source, self._render_page), None
+        static = os.path.join(self.static_dir, *rel.split("/")) if rel else None
+        if static is not None and os.path.isfile(static):
+            return self._get(static, self._load_static), None
+        return None, None
+
+    def _content_path(self, rel, *extra):
+        parts = rel.split("/") if rel else []
+        return os.path.join(self.content_dir, *parts, *extra)
+
+    def _get(self, source, produce):
+        with self._lock:
+            entry = self._cache.get(source)
+        if entry is not None and all(
+            _stat_key(path) == key for path, key in entry[1].items()
+        ):
+            with self._lock:
+                if source in self._cache:
+                    self._cache.move_to_end(source)
+                self.hits += 1
+            events.emit("preview", events.VERBOSE, source=source, result="cached")
+            return entry[0]
+
+        with self._lock:
+            flight = self._inflight.get(source)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[source] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            events.emit("preview", events.VERBOSE, source=source, result="joined")
+            return flight.result[0]
+
+        start = time.perf_counter()
+        try:
+            flight.result = produce(source)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[source]
+                if flight.error is None:
+                    self._cache[source] = flight.result
+                    self._cache.move_to_end(source)
+                    while len(self._cache) > self.max_files:
+                        self._cache.popitem(last=False)
+                    self.renders += 1
+            flight.done.set()
+        events.emit(
+            "preview",
+            events.VERBOSE,
+            source=source,
+            result="miss",
+            duration_ms=events.elapsed_ms(start),
+        )
+        return flight.result[0]
+
+    def _render_page(self, source):
+        # Imported here to avoid a circular import with main.py
+        from functions import markdown_to_html, extract_title
+        from main import render_page
+        from templates import (
+            load_template,
+            refresh_templates,
+            section_template,
+            section_template_candidate,
+        )
+        from toc import Outline
+
+        # Stat before reading, so an edit made while rendering is seen later
+        deps = {source: _stat_key(source)}
+        with open(source, "r", encoding="utf-8") as f:
+            md = f.read()
+        refresh_templates()
+        template_path = section_template(self.content_dir, source, self.template_path)
+        template = load_template(template_path)
+        for path in template.dependencies:
+            deps[path] = _stat_key(path)
+        # Fingerprinted as missing too, so creating it invalidates the page
+        candidate = section_template_candidate(
+            self.content_dir, source, self.template_path
+        )
+        if candidate:
+            deps[candidate] = _stat_key(candidate)
+        definitions = None
+        if self._definitions_file is not None:
+            deps[self.links_path] = _stat_key(self.links_path)
+            definitions = self._definitions_file.get()
+
+        outline = Outline()
+        content_html = markdown_to_html(md, outline=outline, definitions=definitions)
+        title = extract_title(md)
+        page = render_page(
+            template, title, content_html, self.basepath, outline.to_html()
+        )
+        return StaticFile(source[:-3] + ".html", page.encode("utf-8")), deps
+
+    def _load_static(self, path):
+        deps = {path: _stat_key(path)}
+        with open(path, "rb") as f:
+            return StaticFile(path, f.read()), deps
+
+
+def _relative(url_path):
+    """Return the URL path relative to the site root, or None if it escapes."""
+    parts = [part for part in url_path.split("/") if part]
+    if any(part in (".", "..") or "\\" in part for part in parts):
+        return None
+    return posixpath.join(*parts) if parts else ""
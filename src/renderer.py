@@ -0,0 +1,123 @@
+from htmlnode import LeafNode, ParentNode, escape_text, props_to_attributes
+
+
+class Renderer:
+    """
+    Receives rendering events for one document.
+
+    `open`/`close` bracket an element with children, `leaf` emits an element
+    without children (a tag of None is plain text), and `result` returns
+    whatever the renderer produced. Events arrive in document order.
+    """
+
+    def open(self, tag, props=None):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def leaf(self, tag, value, props=None):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class HTMLRenderer(Renderer):
+    """Writes HTML straight into a list of string chunks, without HTMLNodes.
+
+    Applies the same checks as LeafNode and ParentNode so both renderers
+    accept and reject the same documents.
+    """
+
+    def __init__(self):
+        self._out = []
+        # open elements as [tag, number of children emitted]
+        self._open = []
+
+    def open(self, tag, props=None):
+        if self._open:
+            self._open[-1][1] += 1
+        self._open.append([tag, 0])
+        if props:
+            self._out.append(f"<{tag}{props_to_attributes(props)}>")
+        else:
+            self._out.append(f"<{tag}>")
+
+    def close(self):
+        tag, count = self._open.pop()
+        if not count:
+            raise ValueError("Parent node must have a children.")
+        self._out.append(f"</{tag}>")
+
+    def leaf(self, tag, value, props=None):
+        if self._open:
+            self._open[-1][1] += 1
+        out = self._out
+        if tag in LeafNode.SELF_CLOSING_TAGS:
+            out.append(f"<{tag}{props_to_attributes(props)} />")
+        elif not value:
+            if tag not in LeafNode.EMPTY_TAGS:
+                raise ValueError("All leaf nodes must have a value.")
+            out.append(f"<{tag}{props_to_attributes(props)}></{tag}>")
+        elif tag is None:
+            out.append(escape_text(value))
+        elif props:
+            attributes = props_to_attributes(props)
+            out.append(f"<{tag}{attributes}>{escape_text(value)}</{tag}>")
+        else:
+            out.append(f"<{tag}>{escape_text(value)}</{tag}>")
+
+    def result(self):
+        return "".join(self._out)
+
+
+class NodeTreeRenderer(Renderer):
+    """Builds the HTMLNode tree, for callers that need to inspect it."""
+
+    def __init__(self):
+        self._root = None
+        # open elements as (tag, props, children)
+        self._open = []
+
+    def open(self, tag, props=None):
+        self._open.append((tag, props, []))
+
+    def close(self):
+        tag, props, children = self._open.pop()
+        node = ParentNode(tag=tag, children=children, props=props)
+        if self._open:
+            self._open[-1][2].append(node)
+        else:
+            self._root = node
+
+    def leaf(self, tag, value, props=None):
+        self._open[-1][2].append(LeafNode(tag=tag, value=value, props=props))
+
+    def result(self):
+        return self._root
+
+
+class RecordingRenderer(Renderer):
+    """Forwards events to another renderer, noting link and image URLs."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.hrefs = []
+        self.srcs = []
+
+    def open(self, tag, props=None):
+        self.inner.open(tag, props)
+
+    def close(self):
+        self.inner.close()
+
+    def leaf(self, tag, value, props=None):
+        if tag == "a":
+            self.hrefs.append(props["href"])
+        elif tag == "img":
+            self.srcs.append(props["src"])
+        self.inner.leaf(tag, value, props)
+
+    def result(self):
+        return self.inner.result()
@@ -0,0 +1,272 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+import events
+
+# Types worth gzipping; images and archives are already compressed
+_COMPRESSIBLE = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+# Bodies smaller than this are not worth a compressed variant
+_MIN_GZIP_SIZE = 256
+# Bodies up to this size go out in the same write as the headers
+_SINGLE_WRITE_SIZE = 64 * 1024
+
+
+class _Variant:
+    """One encoding of a file: its body and precomputed response headers."""
+
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, body, etag, content_type, encoding=None):
+        self.body = body
+        self.etag = etag
+        lines = [
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"ETag: {etag}",
+            "Vary: Accept-Encoding",
+        ]
+        if encoding:
+            lines.append(f"Content-Encoding: {encoding}")
+        self.headers = "".join(line + "\r\n" for line in lines).encode("latin-1")
+
+
+class StaticFile:
+    """A served file: the identity body and, when smaller, a gzip variant."""
+
+    __slots__ = ("identity", "gzip")
+
+    def __init__(self, path, body):
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.identity = _Variant(body, f'"{digest}"', content_type)
+        self.gzip = None
+        if len(body) >= _MIN_GZIP_SIZE and content_type.startswith(_COMPRESSIBLE):
+            # mtime=0 keeps the compressed bytes (and their ETag) stable
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip = _Variant(
+                    compressed, f'"{digest}-gz"', content_type, "gzip"
+                )
+
+
+class SiteFiles:
+    """
+    A built site held in memory, keyed by URL path ("/blog/index.html").
+
+    Files are read once, hashed for their ETag and gzipped (when that helps)
+    at load time, so serving a request never touches the disk.
+    """
+
+    def __init__(self, files: dict[str, StaticFile]):
+        self.files = files
+
+    @classmethod
+    def from_directory(cls, root: str) -> "SiteFiles":
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, root).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    files["/" + rel] = StaticFile(rel, f.read())
+        return cls(files)
+
+    @classmethod
+    def from_bundle(cls, bundle_path: str) -> "SiteFiles":
+        """Load a .zip, .tar or .tar.gz written by `output.BundleWriter`."""
+        files = {}
+        if bundle_path.lower().endswith(".zip"):
+            import zipfile
+
+            with zipfile.ZipFile(bundle_path) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir():
+                        files["/" + info.filename] = StaticFile(
+                            info.filename, zf.read(info)
+                        )
+        else:
+            import tarfile
+
+            with tarfile.open(bundle_path) as tar:
+                for member in tar:
+                    if member.isfile():
+                        body = tar.extractfile(member).read()
+                        files["/" + member.name] = StaticFile(member.name, body)
+        return cls(files)
+
+    def lookup(self, url_path: str):
+        """Return (StaticFile or None, redirect location or None) for a path."""
+        if url_path.endswith("/"):
+            return self.files.get(url_path + "index.html"), None
+        found = self.files.get(url_path)
+        if found is None and url_path + "/index.html" in self.files:
+            # Like http.server: directories are served with a trailing slash
+            # so relative links inside them resolve
+            return None, url_path + "/"
+        return found, None
+
+
+def _accepts_gzip(header):
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if not q.startswith("q="):
+                return True
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+class _DateCache:
+    """The HTTP Date header value, formatted at most once per second."""
+
+    def __init__(self):
+        self._second = None
+        self._value = None
+
+    def get(self):
+        now = int(time.time())
+        if now != self._second:
+            self._value = formatdate(now, usegmt=True)
+            self._second = now
+        return self._value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SiteServer"
+    # Large bodies follow the headers in a second write
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        site = self.server.site
+        path = unquote(urlsplit(self.path).path)
+        try:
+            found, location = site.lookup(path)
+        except Exception as exc:
+            events.emit("warning", events.QUIET, path=path, message=str(exc))
+            self._send_empty(500)
+            return
+        if location is not None:
+            query = urlsplit(self.path).query
+            if query:
+                location += "?" + query
+            self._send_empty(301, f"Location: {location}")
+            return
+        if found is None:
+            self._send_empty(404)
+            return
+
+        variant = found.identity
+        if found.gzip is not None and _accepts_gzip(
+            self.headers.get("Accept-Encoding", "")
+        ):
+            variant = found.gzip
+
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match and _etag_matches(if_none_match, variant.etag):
+            self._send_empty(304, f"ETag: {variant.etag}", "Vary: Accept-Encoding")
+            return
+
+        head = self._head(200, variant.headers)
+        if not send_body:
+            self.wfile.write(head)
+        elif len(variant.body) <= _SINGLE_WRITE_SIZE:
+            self.wfile.write(head + variant.body)
+        else:
+            self.wfile.write(head)
+            self.wfile.write(variant.body)
+        events.emit("request", events.VERBOSE, path=path, result=200)
+
+    def _send_empty(self, status, *header_lines):
+        lines = list(header_lines)
+        if status != 304:
+            lines.append("Content-Length: 0")
+        headers = "".join(line + "\r\n" for line in lines).encode("latin-1")
+        self.wfile.write(self._head(status, headers))
+        events.emit("request", events.VERBOSE, path=self.path, result=status)
+
+    def _head(self, status, headers):
+        reason = self.responses[status][0]
+        return (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Server: {self.server_version}\r\n"
+            f"Date: {self.server.dates.get()}\r\n".encode("latin-1")
+            + headers
+            + b"\r\n"
+        )
+
+    def log_message(self, format, *args):
+        # Requests are reported through the event log instead
+        pass
+
+
+def _etag_matches(header, etag):
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class SiteServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server answering requests from a `SiteFiles`.
+
+    Any object with a `lookup(url_path)` method like `SiteFiles.lookup` can
+    be served, such as `preview.PreviewSite`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, site: SiteFiles):
+        self.site = site
+        self.dates = _DateCache()
+        super().__init__(address, _Handler)
+
+
+def parse_address(spec: str) -> tuple[str, int]:
+    """Parse "PORT", ":PORT" or "HOST:PORT"; the host defaults to 127.0.0.1."""
+    host, _, port = spec.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Invalid address {spec!r}, expected [HOST:]PORT")
+    return host or "127.0.0.1", int(port)
+
+
+def serve(address: tuple[str, int], site) -> None:
+    """Serve `site` on `address` until interrupted."""
+    with SiteServer(address, site) as server:
+        host, port = server.server_address[:2]
+        events.emit("serve", url=f"http://{host}:{port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def start_in_thread(site: SiteFiles, address=("127.0.0.1", 0)) -> SiteServer:
+    """Start a server on a background thread (for tests and benchmarks)."""
+    server = SiteServer(address, site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,96 @@
+import os
+import shutil
+import events
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse a shard spec like "2/4" into (index, count).
+
+    Shard indexes are 1-based. Raises ValueError on malformed specs.
+    """
+    try:
+        index_str, count_str = spec.split("/")
+        index, count = int(index_str), int(count_str)
+    except ValueError as exc:
+        raise ValueError(f"Invalid shard spec: {spec!r} (expected i/N)") from exc
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard spec: {spec!r} (expected 1 <= i <= N)")
+    return index, count
+
+
+def partition_pages(pages: list[tuple[str, str]], count: int) -> list[list]:
+    """
+    Split (source, dest) page pairs into `count` shards balanced by source size.
+
+    Pages are assigned largest first to the shard with the smallest total size,
+    ties broken by path and shard index, so every machine computes the same
+    partition for the same content tree.
+    """
+    sized = sorted(
+        ((os.path.getsize(src), src, dest) for src, dest in pages),
+        key=lambda item: (-item[0], item[1]),
+    )
+    shards = [[] for _ in range(count)]
+    totals = [0] * count
+    for size, src, dest in sized:
+        target = min(range(count), key=lambda i: (totals[i], i))
+        shards[target].append((src, dest))
+        totals[target] += size
+    for shard in shards:
+        shard.sort()
+    return shards
+
+
+def shard_dir(shards_root: str, index: int, count: int) -> str:
+    """Return the output directory used by shard `index` of `count`."""
+    return os.path.join(shards_root, f"shard-{index}-of-{count}")
+
+
+def reset_shard_dir(shards_root: str, index: int, count: int) -> str:
+    """Empty (or create) the output directory of a shard and return it.
+
+    Files left by an earlier run, such as pages deleted since, must not be
+    merged into the site.
+    """
+    path = shard_dir(shards_root, index, count)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    return path
+
+
+def merge_shards(
+    shards_root: str, static_dir: str, dest_dir: str, writer, count: int
+) -> None:
+    """
+    Assemble the final site from static assets and the outputs of `count` shards.
+
+    Copies static assets and then the contents of shard directories 1 to
+    `count` of `count` into `dest_dir` through `writer`, so unchanged files
+    are left alone, and finally prunes anything no longer produced. Output
+    directories of other shard counts are ignored; a missing one is an error.
+    """
+    # Imported here so shard workers never pay for it
+    from copy_static import copy_static_to_public
+
+    shard_paths = [shard_dir(shards_root, i, count) for i in range(1, count + 1)]
+    for index, shard_path in enumerate(shard_paths, start=1):
+        if not os.path.isdir(shard_path):
+            raise ValueError(f"No output for shard {index}/{count} in {shards_root}")
+
+    copy_static_to_public(static_dir, dest_dir, writer=writer)
+
+    for shard_path in shard_paths:
+        events.emit("merge", shard=shard_path)
+        for root, _, files in os.walk(shard_path):
+            for name in files:
+                source = os.path.join(root, name)
+                rel = os.path.relpath(source, shard_path)
+                writer.write(os.path.join(dest_dir, rel), _read_bytes(source))
+
+    writer.prune(dest_dir)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,228 @@
+import os
+import re
+
+# {{ Name }} placeholders and {% tag "arg" %} / {% tag name %} statements
+_TOKEN = re.compile(r"(\{\{ [A-Za-z_]\w* \}\}|\{%.*?%\})", re.DOTALL)
+_STATEMENT = re.compile(r'\{%\s*(\w+)(?:\s+"([^"]*)"|\s+(\w+))?\s*%\}')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+class _Placeholders(dict):
+    # Unknown placeholders are left in the output untouched
+    def __missing__(self, key):
+        return "{{ " + key + " }}"
+
+
+class Template:
+    """
+    A template compiled into a single format string.
+
+    Includes and the `extends` chain are resolved at compile time, so
+    rendering is one `str.format_map` call. `dependencies` lists every file
+    read to build it.
+    """
+
+    def __init__(self, path, format_string, dependencies):
+        self.path = path
+        self.dependencies = dependencies
+        self._format_string = format_string
+
+    def render(self, values: dict) -> str:
+        return self._format_string.format_map(_Placeholders(values))
+
+
+def _parse(path, source):
+    """Parse template source into (nodes, parent name or None).
+
+    Nodes are ("text", str), ("var", name), ("include", name) and
+    ("block", name, nodes).
+    """
+    root = []
+    stack = [("root", root)]
+    parent = None
+
+    for piece in _TOKEN.split(source):
+        if not piece:
+            continue
+        nodes = stack[-1][1]
+        if piece.startswith("{{"):
+            nodes.append(("var", piece[3:-3]))
+            continue
+        if not piece.startswith("{%"):
+            nodes.append(("text", piece))
+            continue
+
+        m = _STATEMENT.fullmatch(piece)
+        if not m:
+            raise TemplateError(f"{path}: invalid statement {piece!r}")
+        tag, quoted, bare = m.groups()
+        if tag == "include" and quoted:
+            nodes.append(("include", quoted))
+        elif tag == "extends" and quoted:
+            if parent is not None or len(stack) > 1:
+                raise TemplateError(f"{path}: extends must be a top-level statement")
+            parent = quoted
+        elif tag == "block" and bare:
+            children = []
+            nodes.append(("block", bare, children))
+            stack.append((bare, children))
+        elif tag == "endblock":
+            if len(stack) == 1:
+                raise TemplateError(f"{path}: endblock without block")
+            stack.pop()
+        else:
+            raise TemplateError(f"{path}: invalid statement {piece!r}")
+
+    if len(stack) > 1:
+        raise TemplateError(f"{path}: block {stack[-1][0]!r} is not closed")
+    return root, parent
+
+
+def _collect_blocks(nodes, blocks, path):
+    # Remember where each block was defined so its includes resolve from there
+    for node in nodes:
+        if node[0] == "block":
+            blocks.setdefault(node[1], (node[2], path))
+            _collect_blocks(node[2], blocks, path)
+
+
+class _Compiler:
+    def __init__(self):
+        self.dependencies = set()
+
+    def compile(self, path):
+        parts = []
+        self._emit_file(path, {}, parts, ())
+        return "".join(parts)
+
+    def _read(self, path, chain):
+        path = os.path.abspath(path)
+        if path in chain:
+            cycle = " -> ".join(chain + (path,))
+            raise TemplateError(f"Template include cycle: {cycle}")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except OSError as exc:
+            raise TemplateError(f"Cannot read template {path}: {exc}") from exc
+        self.dependencies.add(path)
+        return path, _parse(path, source)
+
+    def _emit_file(self, path, overrides, parts, chain):
+        path, (nodes, parent) = self._read(path, chain)
+        chain = chain + (path,)
+        if parent is None:
+            self._emit(nodes, overrides, parts, path, chain)
+            return
+
+        # A child template only contributes blocks; the closest definition wins
+        blocks = dict(overrides)
+        _collect_blocks(nodes, blocks, path)
+        parent_path = os.path.join(os.path.dirname(path), parent)
+        self._emit_file(parent_path, blocks, parts, chain)
+
+    def _emit(self, nodes, overrides, parts, path, chain):
+        for node in nodes:
+            kind = node[0]
+            if kind == "text":
+                parts.append(node[1].replace("{", "{{").replace("}", "}}"))
+            elif kind == "var":
+                parts.append("{" + node[1] + "}")
+            elif kind == "include":
+                include_path = os.path.join(os.path.dirname(path), node[1])
+                self._emit_file(include_path, {}, parts, chain)
+            else:
+                children, source = overrides.get(node[1], (node[2], path))
+                self._emit(children, overrides, parts, source, chain)
+
+
+# path -> (Template, {dependency path: stat key})
+_cache = {}
+# candidate section template path -> whether it exists
+_section_cache = {}
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def compile_template(path: str) -> Template:
+    """Compile the template at `path`, resolving includes and extends.
+
+    Include and extends names are relative to the directory of the file
+    that contains them.
+    """
+    compiler = _Compiler()
+    format_string = compiler.compile(path)
+    return Template(
+        os.path.abspath(path), format_string, frozenset(compiler.dependencies)
+    )
+
+
+def template_from_string(source: str) -> Template:
+    """Compile template text with placeholders only (no statements)."""
+    parts = []
+    for piece in _TOKEN.split(source):
+        if piece.startswith("{{"):
+            parts.append("{" + piece[3:-3] + "}")
+        else:
+            parts.append(piece.replace("{", "{{").replace("}", "}}"))
+    return Template(None, "".join(parts), frozenset())
+
+
+def load_template(path: str) -> Template:
+    """Return the compiled template for `path`, compiling it on first use."""
+    path = os.path.abspath(path)
+    entry = _cache.get(path)
+    if entry is None:
+        template = compile_template(path)
+        stats = {dep: _stat_key(dep) for dep in template.dependencies}
+        entry = _cache[path] = (template, stats)
+    return entry[0]
+
+
+def refresh_templates() -> set[str]:
+    """Drop cached templates whose files changed; return their paths."""
+    changed = set()
+    for path, (_, stats) in list(_cache.items()):
+        if any(_stat_key(dep) != key for dep, key in stats.items()):
+            # pop: another thread (e.g. in the preview server) may race us
+            _cache.pop(path, None)
+            changed.add(path)
+    _section_cache.clear()
+    return changed
+
+
+def section_template_candidate(
+    content_root: str, source_path: str, default_path: str
+) -> str | None:
+    """Return the section template path looked up for a page, if it has one."""
+    rel = os.path.relpath(source_path, content_root)
+    if os.sep not in rel:
+        return None
+    section = rel.split(os.sep, 1)[0]
+    return os.path.join(os.path.dirname(default_path), "templates", section + ".html")
+
+
+def section_template(content_root: str, source_path: str, default_path: str) -> str:
+    """
+    Pick the template for a content page.
+
+    Pages under content/<section>/ use templates/<section>.html (next to the
+    default template) when it exists; everything else uses `default_path`.
+    """
+    candidate = section_template_candidate(content_root, source_path, default_path)
+    if candidate:
+        exists = _section_cache.get(candidate)
+        if exists is None:
+            exists = _section_cache[candidate] = os.path.isfile(candidate)
+        if exists:
+            return candidate
+    return default_path
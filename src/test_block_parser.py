@@ -0,0 +1,94 @@
+import unittest
+from block_parser import parse_blocks, CODE, ITEM, LIST, PARAGRAPH, QUOTE
+
+
+class TestBlockParser(unittest.TestCase):
+    def test_flat_document(self):
+        doc = parse_blocks("# Title\n\nSome text\nmore\n\n- a\n- b")
+        self.assertEqual(
+            [block.kind for block in doc.children], ["heading", PARAGRAPH, LIST]
+        )
+        self.assertEqual(doc.children[1].text, "Some text\nmore")
+        self.assertEqual(len(doc.children[2].children), 2)
+
+    def test_nested_list(self):
+        doc = parse_blocks("- a\n  - b\n    - c\n- d")
+        outer = doc.children[0]
+        self.assertEqual([item.kind for item in outer.children], [ITEM, ITEM])
+        nested = outer.children[0].children[1]
+        self.assertEqual(nested.kind, LIST)
+        innermost = nested.children[0].children[1].children[0]
+        self.assertEqual(innermost.children[0].text, "c")
+
+    def test_quote_with_list(self):
+        doc = parse_blocks("> intro\n>\n> - x\n> - y")
+        quote = doc.children[0]
+        self.assertEqual(quote.kind, QUOTE)
+        self.assertEqual([block.kind for block in quote.children], [PARAGRAPH, LIST])
+
+    def test_loose_item(self):
+        doc = parse_blocks("- first\n\n  second\n- next")
+        items = doc.children[0].children
+        self.assertTrue(items[0].loose)
+        self.assertFalse(items[1].loose)
+
+    def test_blank_lines_in_nested_items(self):
+        # Only items open across the blank line become loose
+        doc = parse_blocks("- a\n  - b\n\n  c\n- d\n  - e\n\n> q\n\n- f")
+        outer = doc.children[0].children
+        self.assertEqual([item.loose for item in outer], [True, False])
+        inner = outer[0].children[1].children[0]
+        self.assertFalse(inner.loose)
+        self.assertEqual([block.kind for block in doc.children], [LIST, QUOTE, LIST])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        doc = parse_blocks("```python\na = 1\n\nb = 2\n```")
+        code = doc.children[0]
+        self.assertEqual((code.kind, code.language), (CODE, "python"))
+        self.assertEqual(code.text, "a = 1\n\nb = 2")
+
+    def test_fence_closes_only_on_backtick_line(self):
+        doc = parse_blocks("```\ncode x```\nmore\n```\nafter")
+        self.assertEqual([block.kind for block in doc.children], [CODE, PARAGRAPH])
+        self.assertEqual(doc.children[0].text, "code x```\nmore")
+
+    def test_ordered_list_requires_sequence(self):
+        doc = parse_blocks("1. a\n2. b\n\n3. c")
+        self.assertEqual([block.kind for block in doc.children], [LIST])
+        self.assertEqual(len(doc.children[0].children), 3)
+        doc = parse_blocks("1. a\n\n3. b")
+        self.assertEqual([block.kind for block in doc.children], [LIST, PARAGRAPH])
+        self.assertEqual(parse_blocks("2. a").children[0].kind, PARAGRAPH)
+
+    def test_link_definitions_are_collected(self):
+        doc = parse_blocks(
+            "[Docs]: https://example.com\n[docs]: /other\n\n"
+            "> [Two  Words]: </two>\n\ntext\n[inside]: /paragraph"
+        )
+        self.assertEqual(
+            doc.definitions, {"docs": "https://example.com", "two words": "/two"}
+        )
+        self.assertEqual([block.kind for block in doc.children], [QUOTE, PARAGRAPH])
+        self.assertEqual(doc.children[1].text, "text\n[inside]: /paragraph")
+
+    def test_link_definitions_into_shared_dict(self):
+        shared = {}
+        parse_blocks("[a]: /a", shared)
+        doc = parse_blocks("[b]: /b", shared)
+        self.assertIs(doc.definitions, shared)
+        self.assertEqual(shared, {"a": "/a", "b": "/b"})
+
+    def test_deep_nesting_is_iterative(self):
+        depth = 1200
+        md = "\n".join("  " * i + "- item" for i in range(depth))
+        block = parse_blocks(md).children[0]
+        levels = 0
+        while block.kind == LIST:
+            levels += 1
+            item = block.children[0]
+            block = item.children[-1]
+        self.assertEqual(levels, depth)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+import events
+from daemon import SiteBuilder, send_request, serve
+
+
+class TestSiteBuilder(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.static)
+        self._write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self._write(os.path.join(self.static, "index.css"), "body {}")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        self._write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.builder = SiteBuilder(self.content, self.template, self.static, self.dest)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_initial_build_renders_everything(self):
+        stats = self.builder.build()
+        self.assertEqual(stats["rendered"], 2)
+        self.assertTrue(stats["static_copied"])
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(),
+                '<title>Home</title><div><h1 id="home">Home</h1><p>hello</p></div>',
+            )
+
+    def test_rebuild_only_changed_pages(self):
+        self.builder.build()
+        stats = self.builder.build()
+        self.assertEqual((stats["rendered"], stats["written"]), (0, 0))
+
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nchanged text")
+        stats = self.builder.build()
+        self.assertEqual((stats["rendered"], stats["cached"]), (1, 1))
+        self.assertFalse(stats["static_copied"])
+
+    def test_links_file_is_reloaded_on_change(self):
+        links = os.path.join(self._tmp.name, "links.md")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\n[about]")
+        builder = SiteBuilder(
+            self.content, self.template, self.static, self.dest, links_path=links
+        )
+        builder.build()
+        self._write(links, "[about]: /about")
+        stats = builder.build()
+        self.assertEqual((stats["rendered"], stats["written"]), (2, 1))
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertIn('<a href="/about">about</a>', f.read())
+        self.assertEqual(builder.build()["rendered"], 0)
+
+    def test_template_change_rewrites_from_cache(self):
+        self.builder.build()
+        self._write(self.template, "<h6>{{ Title }}</h6>{{ Content }}")
+        stats = self.builder.build()
+        self.assertEqual((stats["rendered"], stats["written"]), (0, 2))
+
+    def test_section_partial_change_rewrites_only_that_section(self):
+        templates = os.path.join(os.path.dirname(self.template), "templates")
+        os.makedirs(templates)
+        self._write(os.path.join(templates, "nav.html"), "<nav>blog</nav>")
+        self._write(
+            os.path.join(templates, "blog.html"),
+            '{% include "nav.html" %}{{ Content }}',
+        )
+        self.builder.build()
+        with open(os.path.join(self.dest, "blog", "index.html"), encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("<nav>blog</nav>"))
+
+        self._write(os.path.join(templates, "nav.html"), "<nav>the blog</nav>")
+        stats = self.builder.build()
+        self.assertEqual((stats["rendered"], stats["written"]), (0, 1))
+
+    def test_removed_source_deletes_output(self):
+        self.builder.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        stats = self.builder.build()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+
+
+class TestBuildServer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        static = os.path.join(root, "static")
+        template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        os.makedirs(static)
+        with open(template, "w", encoding="utf-8") as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(self.content, "index.md"), "w", encoding="utf-8") as f:
+            f.write("# Home")
+        builder = SiteBuilder(
+            self.content, template, static, os.path.join(root, "public")
+        )
+        self.socket_path = os.path.join(root, "daemon.sock")
+        self.log = StringIO()
+        events.configure(self.log)
+        self.thread = threading.Thread(target=serve, args=(self.socket_path, builder))
+        self.thread.start()
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            send_request(self.socket_path, "shutdown")
+            self.thread.join()
+        events.configure()
+        self._tmp.cleanup()
+
+    def request(self, command):
+        # The daemon listens once its initial build is done
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                return send_request(self.socket_path, command)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def test_commands(self):
+        self.assertEqual(self.request("ping"), {"ok": True})
+        self.assertIn('"event": "daemon"', self.log.getvalue())
+        response = self.request("build")
+        self.assertEqual((response["ok"], response["rendered"]), (True, 0))
+        with open(os.path.join(self.content, "about.md"), "w", encoding="utf-8") as f:
+            f.write("# About")
+        self.assertEqual(self.request("build")["rendered"], 1)
+        self.assertEqual(self.request("full")["rendered"], 2)
+        with open(os.path.join(self.content, "broken.md"), "w", encoding="utf-8") as f:
+            f.write("no title")
+        response = self.request("build")
+        self.assertFalse(response["ok"])
+        self.assertIn("No H1 header found", response["error"])
+        self.assertEqual(
+            self.request("reload"), {"ok": False, "error": "Unknown command: reload"}
+        )
+
+    def test_shutdown_removes_socket(self):
+        self.assertEqual(self.request("shutdown"), {"ok": True})
+        self.thread.join(10)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+
+class TestRebuildClient(unittest.TestCase):
+    def test_missing_daemon_is_a_clean_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = subprocess.run(
+                [sys.executable, "main.py", "--rebuild", os.path.join(tmp, "sock")],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True,
+                text=True,
+            )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("error: no build daemon at", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
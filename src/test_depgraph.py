@@ -0,0 +1,190 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from depgraph import DependencyGraph
+from main import find_pages, generate_pages_recursive
+from output import OutputWriter
+from templates import refresh_templates
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.graph_path = os.path.join(root, "depgraph.json")
+        os.makedirs(os.path.join(self.content, "about"))
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.static, "images"))
+        self._write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self._write(os.path.join(self.static, "images", "logo.png"), "png")
+        self._write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\nSee [about](/about) and ![logo](/images/logo.png)",
+        )
+        self._write(os.path.join(self.content, "about", "index.md"), "# About")
+        self._write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.build()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        # Make every rewrite visible to stat, however coarse the clock
+        st = os.stat(path)
+        bump = getattr(self, "_bump", 0) + 1
+        self._bump = bump
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 10**9))
+
+    def _path(self, *parts):
+        return os.path.join(self.content, *parts)
+
+    def build(self, config=None, shared_inputs=()):
+        graph = DependencyGraph(
+            self.content,
+            self.static,
+            self.graph_path,
+            config,
+            self.template,
+            shared_inputs,
+        )
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, "/", OutputWriter(), graph
+            )
+        graph.save()
+
+    def stale(self, config=None, shared_inputs=()):
+        graph = DependencyGraph(
+            self.content,
+            self.static,
+            self.graph_path,
+            config,
+            self.template,
+            shared_inputs,
+        )
+        return graph.stale_pages(find_pages(self.content, self.dest))
+
+    def test_unchanged_tree_has_nothing_stale(self):
+        self.assertEqual(self.stale(), set())
+
+    def test_template_change_makes_every_page_stale(self):
+        self._write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.stale()), 3)
+
+    def test_image_change_only_affects_pages_using_it(self):
+        self._write(os.path.join(self.static, "images", "logo.png"), "png2")
+        self.assertEqual(self.stale(), {self._path("index.md")})
+
+    def test_new_section_template_makes_its_pages_stale(self):
+        templates_dir = os.path.join(self._tmp.name, "templates")
+        os.makedirs(templates_dir)
+        self._write(os.path.join(templates_dir, "blog.html"), "{{ Content }}")
+        self.assertEqual(self.stale(), {self._path("blog", "index.md")})
+
+    def test_body_edit_does_not_affect_linking_pages(self):
+        self._write(self._path("about", "index.md"), "# About\n\nmore")
+        self.assertEqual(self.stale(), {self._path("about", "index.md")})
+
+    def test_retitled_page_makes_linking_pages_stale(self):
+        self._write(self._path("about", "index.md"), "# About us")
+        self.assertEqual(
+            self.stale(), {self._path("about", "index.md"), self._path("index.md")}
+        )
+
+    def test_removed_page_makes_linking_pages_stale(self):
+        os.remove(self._path("about", "index.md"))
+        self.assertEqual(self.stale(), {self._path("index.md")})
+
+    def test_missing_output_is_stale(self):
+        os.remove(os.path.join(self.dest, "blog", "index.html"))
+        self.assertEqual(self.stale(), {self._path("blog", "index.md")})
+
+    def test_skipped_pages_survive_prune(self):
+        self._write(self._path("blog", "index.md"), "# Blog\n\nnew")
+        graph = DependencyGraph(self.content, self.static, self.graph_path)
+        writer = OutputWriter()
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content, self.template, self.dest, "/", writer, graph
+            )
+        self.assertEqual(writer.written, 1)
+        self.assertEqual(writer.prune(self.dest), [])
+
+    def test_checkpoint_lets_interrupted_build_resume(self):
+        self._write(self._path("about", "index.md"), "# About\n\nnew")
+        self._write(self._path("blog", "index.md"), "no title")
+        self._write(self._path("index.md"), "# Home\n\nnew")
+        graph = DependencyGraph(self.content, self.static, self.graph_path)
+        with self.assertRaises(ValueError), redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                OutputWriter(),
+                graph,
+                checkpoint_interval=0,
+            )
+        self.assertEqual(
+            self.stale(), {self._path("blog", "index.md"), self._path("index.md")}
+        )
+
+    def test_resume_keeps_pages_stale_at_interrupt(self):
+        # A template change and a retitle are recorded with the first page
+        # rendered; the other pages must still be rebuilt after a resume
+        self._write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        refresh_templates()
+        self._write(self._path("about", "index.md"), "# About us")
+        self._write(self._path("blog", "index.md"), "no title")
+        graph = DependencyGraph(
+            self.content, self.static, self.graph_path, None, self.template
+        )
+        with self.assertRaises(ValueError), redirect_stdout(StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.dest,
+                "/",
+                OutputWriter(),
+                graph,
+                checkpoint_interval=0,
+            )
+        self._write(self._path("blog", "index.md"), "# Blog")
+        self.assertEqual(
+            self.stale(), {self._path("blog", "index.md"), self._path("index.md")}
+        )
+        self.build()
+        self.assertEqual(self.stale(), set())
+        with open(os.path.join(self.dest, "index.html"), encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("<h1>Home</h1>"))
+
+    def test_shared_input_change_makes_every_page_stale(self):
+        links = os.path.join(self._tmp.name, "links.md")
+        os.remove(self.graph_path)
+        self.build(shared_inputs=[links])
+        self.assertEqual(self.stale(shared_inputs=[links]), set())
+        with open(self.graph_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(list(data["shared"]), [links])
+        for record in data["pages"].values():
+            self.assertNotIn(links, record["inputs"])
+        self._write(links, "[a]: /a")
+        self.assertEqual(len(self.stale(shared_inputs=[links])), 3)
+        # Adding a shared input is a change too
+        self.assertEqual(len(self.stale()), 3)
+
+    def test_config_change_discards_graph(self):
+        self.assertEqual(len(self.stale(config={"basepath": "/x/"})), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
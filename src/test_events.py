@@ -0,0 +1,72 @@
+import json
+import unittest
+from io import StringIO
+import events
+from events import EventLog
+
+
+class TestEventLog(unittest.TestCase):
+    def test_writes_json_lines_up_to_verbosity(self):
+        stream = StringIO()
+        log = EventLog(stream, events.NORMAL)
+        log.emit("summary", written=2)
+        log.emit("page", events.VERBOSE, source="a.md", result="written")
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["event"], "summary")
+        self.assertEqual(records[0]["written"], 2)
+        self.assertIn("ts", records[0])
+
+    def test_quiet_still_counts(self):
+        stream = StringIO()
+        log = EventLog(stream, events.QUIET)
+        log.emit("page", events.VERBOSE, result="cached")
+        log.emit("page", events.VERBOSE, result="cached")
+        self.assertEqual(stream.getvalue(), "")
+        self.assertEqual(log.counts[("page", "cached")], 2)
+
+    def test_stage_emits_duration(self):
+        stream = StringIO()
+        log = EventLog(stream)
+        with log.stage("pages"):
+            pass
+        record = json.loads(stream.getvalue())
+        self.assertEqual(record["event"], "stage")
+        self.assertEqual(record["stage"], "pages")
+        self.assertGreaterEqual(record["duration_ms"], 0)
+        self.assertIn("pages", log.stages)
+
+    def test_metrics_text(self):
+        log = EventLog(StringIO(), events.QUIET)
+        log.emit("page", result="written", duration_ms=1500, bytes_in=10, bytes_out=40)
+        log.emit("page", result="written", duration_ms=500, bytes_in=5, bytes_out=20)
+        log.emit("copy", path='a"b', result="unchanged")
+        text = log.metrics_text()
+        self.assertIn("# TYPE site_build_events_total counter\n", text)
+        self.assertIn(
+            'site_build_events_total{event="page",result="written"} 2\n', text
+        )
+        self.assertIn('site_build_event_seconds_total{event="page"} 2.000000\n', text)
+        self.assertIn(
+            'site_build_bytes_total{event="page",direction="out"} 60\n', text
+        )
+        self.assertNotIn("stage_seconds", text)
+
+    def test_label_values_are_escaped(self):
+        log = EventLog(StringIO(), events.QUIET)
+        log.emit("copy", result='a"b\\c')
+        self.assertIn('result="a\\"b\\\\c"', log.metrics_text())
+
+    def test_configure_replaces_module_log(self):
+        stream = StringIO()
+        log = events.configure(stream, events.VERBOSE)
+        try:
+            events.emit("page", events.VERBOSE, source="x.md")
+            self.assertIs(events.current(), log)
+            self.assertEqual(json.loads(stream.getvalue())["source"], "x.md")
+        finally:
+            events.configure()
+
+
+if __name__ == "__main__":
+    unittest.main()
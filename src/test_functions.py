@@ -7,11 +7,14 @@ from functions import (
     split_nodes_image,
     split_nodes_link,
     text_to_textnodes,
+    split_nodes_reference,
     markdown_to_blocks,
     block_to_block_type,
     BlockType,
+    markdown_to_html,
     markdown_to_html_node,
     extract_title,
+    markdown_to_html_batch,
 )
 
 
@@ -215,6 +218,25 @@ class TestFunctions(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
 
+    def test_split_nodes_reference(self):
+        definitions = {"docs": "/docs", "logo": "/logo.png"}
+        node = TextNode(
+            "See [the docs][Docs], [docs][], ![Logo] and [x][missing]", TextType.TEXT
+        )
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "/docs"),
+                TextNode(", ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "/docs"),
+                TextNode(", ", TextType.TEXT),
+                TextNode("Logo", TextType.IMAGE, "/logo.png"),
+                TextNode(" and [x][missing]", TextType.TEXT),
+            ],
+            split_nodes_reference([node], definitions),
+        )
+        self.assertListEqual(split_nodes_reference([node], {}), [node])
+
     def test_text_to_textnodes_full(self):
         text = "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
         nodes = text_to_textnodes(text)
@@ -380,6 +402,122 @@ class TestFunctions(unittest.TestCase):
         html = root.to_html()
         self.assertEqual(html, "<div><pre><code>print('hello')</code></pre></div>")
 
+    def test_markdown_to_html_nested_list(self):
+        md = "- a\n  - b\n    - c\n- d"
+        root = markdown_to_html_node(md)
+        html = root.to_html()
+        self.assertEqual(
+            html,
+            "<div><ul><li>a<ul><li>b<ul><li>c</li></ul></li></ul></li><li>d</li></ul></div>",
+        )
+
+    def test_markdown_to_html_multi_paragraph_item(self):
+        md = "1. one\n\n   more\n2. two"
+        root = markdown_to_html_node(md)
+        html = root.to_html()
+        self.assertEqual(
+            html, "<div><ol><li><p>one</p><p>more</p></li><li>two</li></ol></div>"
+        )
+
+    def test_markdown_to_html_quote_with_list(self):
+        md = "> Reasons:\n>\n> - one\n> - two"
+        root = markdown_to_html_node(md)
+        html = root.to_html()
+        self.assertEqual(
+            html,
+            "<div><blockquote><p>Reasons:</p><ul><li>one</li><li>two</li></ul>"
+            "</blockquote></div>",
+        )
+
+    def test_markdown_to_html_code_block_unknown_language(self):
+        md = "```elflang\nfunc main(){}\n```"
+        root = markdown_to_html_node(md)
+        html = root.to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-elflang">func main(){}</code></pre></div>',
+        )
+
+    def test_markdown_to_html_code_block_highlighted(self):
+        md = "```python\nreturn 1\n```"
+        root = markdown_to_html_node(md)
+        html = root.to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-python">'
+            '<span class="tok-keyword">return</span> <span class="tok-number">1</span>'
+            "</code></pre></div>",
+        )
+
+    def test_markdown_to_html_empty_code_block(self):
+        cases = {
+            "```\n```": "<code></code>",
+            "```python\n```": '<code class="language-python"></code>',
+            "```elflang\n```": '<code class="language-elflang"></code>',
+        }
+        for md, code in cases.items():
+            expected = f"<div><pre>{code}</pre></div>"
+            self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+            self.assertEqual(markdown_to_html(md), expected)
+
+    def test_markdown_to_html_lazy_list_continuation(self):
+        # A change from the blank-line block splitter, which made this a
+        # paragraph: the unmarked line continues the list item
+        html = markdown_to_html_node("- a\nfoo").to_html()
+        self.assertEqual(html, "<div><ul><li>a\nfoo</li></ul></div>")
+
+    def test_markdown_to_html_empty_heading_is_paragraph(self):
+        for md in ("# ", "##   "):
+            html = markdown_to_html_node(md).to_html()
+            self.assertEqual(html, f"<div><p>{md.strip()}</p></div>")
+        html = markdown_to_html_node("- # ").to_html()
+        self.assertEqual(html, "<div><ul><li>#</li></ul></div>")
+
+    def test_markdown_to_html_reference_links(self):
+        md = "# [Home]\n\n- [a][]\n\n> [b]\n\n[a]: /local\n[home]: /"
+        html = markdown_to_html_node(md, definitions={"a": "/shared", "b": "/b"})
+        self.assertEqual(
+            html.to_html(),
+            '<div><h1><a href="/">Home</a></h1><ul><li><a href="/local">a</a></li>'
+            '</ul><blockquote><a href="/b">b</a></blockquote></div>',
+        )
+
+    def test_markdown_to_html_batch_matches_single_renders(self):
+        docs = ["# Title", "some **bold** text", "# Title", "- a\n- b"]
+        self.assertEqual(
+            markdown_to_html_batch(iter(docs)),
+            [markdown_to_html_node(md).to_html() for md in docs],
+        )
+        self.assertEqual(markdown_to_html_batch([]), [])
+
+    def test_markdown_to_html_batch_on_executor(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        docs = [f"item _{i % 3}_" for i in range(7)]
+        with ProcessPoolExecutor(2) as executor:
+            html = markdown_to_html_batch(docs, executor, min_parallel=1, chunksize=2)
+        self.assertEqual(html, [markdown_to_html_node(md).to_html() for md in docs])
+
+    def test_markdown_to_html_batch_errors_per_document(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        docs = ["# Title", "", "use **** here", "- a"]
+        with self.assertRaises(ValueError):
+            markdown_to_html_batch(docs)
+        results = markdown_to_html_batch(docs, errors="return")
+        self.assertEqual(results[0], "<div><h1>Title</h1></div>")
+        self.assertIsInstance(results[1], ValueError)
+        self.assertIsInstance(results[2], ValueError)
+        self.assertEqual(results[3], "<div><ul><li>a</li></ul></div>")
+        with ProcessPoolExecutor(2) as executor:
+            parallel = markdown_to_html_batch(
+                docs, executor, min_parallel=1, chunksize=1, errors="return"
+            )
+        self.assertEqual([type(r) for r in parallel], [type(r) for r in results])
+        self.assertEqual(parallel[3], results[3])
+        with self.assertRaises(ValueError):
+            markdown_to_html_batch(docs, errors="ignore")
+
     # block_to_block_type tests
     def test_block_to_block_type_heading(self):
         self.assertEqual(block_to_block_type("### Heading"), BlockType.HEADING)
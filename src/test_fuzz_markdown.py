@@ -0,0 +1,49 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+import fuzz_markdown
+from fuzz_markdown import (
+    ADVERSARIAL,
+    adversarial_input,
+    check_differential,
+    random_corpus,
+)
+from functions import markdown_to_html
+
+
+class TestFuzzMarkdown(unittest.TestCase):
+    def test_render_paths_agree_on_random_documents(self):
+        mismatches, raised = check_differential(random_corpus(seed=1, count=300))
+        self.assertEqual(mismatches, [])
+        # Only the raw fragments mixed in should make documents raise
+        self.assertLess(len(raised), 30)
+
+    def test_large_adversarial_input_has_time_bound(self):
+        # Every adversarial family, about 32 KiB each, in one document. This
+        # takes well under a second; the bound only catches runaway (e.g.
+        # backtracking) behaviour. Scaling is measured by fuzz_markdown.py.
+        md = "\n\n".join(
+            adversarial_input(
+                pattern, 2**15 // len(adversarial_input(pattern, 1))
+            )
+            for pattern, _ in ADVERSARIAL.values()
+        )
+        start = time.perf_counter()
+        markdown_to_html(md, definitions={"r": "/r"})
+        self.assertLess(time.perf_counter() - start, 10.0)
+
+    def test_snapshot_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "snapshot.json")
+            argv = ["--count", "50", "--doublings", "0"]
+            with redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(fuzz_markdown.main(argv + ["--record", path]), 0)
+                self.assertEqual(fuzz_markdown.main(argv + ["--compare", path]), 0)
+            self.assertIn("snapshot: 0 of 50 changed", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
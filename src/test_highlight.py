@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import highlight
+from highlight import RegexLexer, register_lexer, tokenize, LEXERS
+
+
+class TestHighlight(unittest.TestCase):
+    def test_python_tokens(self):
+        tokens = tokenize("python", 'def f():\n    return "x"  # done')
+        self.assertEqual(
+            tokens,
+            [
+                ("keyword", "def"),
+                (None, " "),
+                ("name", "f"),
+                (None, "():\n    "),
+                ("keyword", "return"),
+                (None, " "),
+                ("string", '"x"'),
+                (None, "  "),
+                ("comment", "# done"),
+            ],
+        )
+
+    def test_unknown_language(self):
+        self.assertIsNone(tokenize("no-such-language", "x"))
+
+    def test_register_lexer(self):
+        register_lexer(RegexLexer([("keyword", r"\bfunc\b")]), "ElfLang")
+        try:
+            self.assertEqual(
+                tokenize("elflang", "func main"), [("keyword", "func"), (None, " main")]
+            )
+        finally:
+            del LEXERS["elflang"]
+
+    def test_tokens_cached_by_language_and_hash(self):
+        first = tokenize("py", "x = 1")
+        self.assertIs(tokenize("py", "x = 1"), first)
+
+    def test_cache_round_trip(self):
+        tokenize("python", "pass")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "tokens.json")
+            highlight.save_token_cache(path)
+            saved = dict(highlight._token_cache)
+            highlight._token_cache.clear()
+            highlight.load_token_cache(path)
+            self.assertEqual(highlight._token_cache, saved)
+
+    def test_cache_drops_least_recently_used(self):
+        saved = dict(highlight._token_cache)
+        highlight._token_cache.clear()
+        try:
+            with mock.patch.object(highlight, "TOKEN_CACHE_SIZE", 2):
+                first = tokenize("py", "a = 1")
+                tokenize("py", "b = 2")
+                tokenize("py", "a = 1")
+                tokenize("py", "c = 3")
+                self.assertEqual(len(highlight._token_cache), 2)
+                self.assertIs(tokenize("py", "a = 1"), first)
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, "tokens.json")
+                    highlight.save_token_cache(path)
+                    highlight._token_cache.clear()
+                    tokenize("py", "d = 4")
+                    highlight.load_token_cache(path)
+                    # "c = 3" was the oldest saved entry, "d = 4" is in use
+                    self.assertEqual(list(highlight._token_cache.values())[0], first)
+                    self.assertEqual(len(highlight._token_cache), 2)
+        finally:
+            highlight._token_cache.clear()
+            highlight._token_cache.update(saved)
+
+
+if __name__ == "__main__":
+    unittest.main()
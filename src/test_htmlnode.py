@@ -29,6 +29,27 @@ class TestHTMLNode(unittest.TestCase):
         result = ""
         self.assertEqual(node.props_to_html(), result)
 
+    def test_props_are_escaped(self):
+        node = HTMLNode(tag="a", props={"href": "/?a=1&b=2", "title": 'say "hi"'})
+        self.assertEqual(
+            node.props_to_html(), ' href="/?a=1&amp;b=2" title="say &quot;hi&quot;"'
+        )
+
+    def test_props_reassigned(self):
+        node = HTMLNode(tag="a", props={"href": "/old"})
+        node.props = {"href": "/new"}
+        self.assertEqual(node.props_to_html(), ' href="/new"')
+
+    def test_props_changed_in_place(self):
+        node = LeafNode("a", "link", props={"href": "/a"})
+        self.assertEqual(node.to_html(), '<a href="/a">link</a>')
+        node.props["href"] = "/b"
+        self.assertEqual(node.to_html(), '<a href="/b">link</a>')
+
+    def test_invalid_props_string(self):
+        with self.assertRaises(ValueError):
+            HTMLNode(tag="p", props="not json")
+
     ## leafnode tests
     def test_leaf_to_html_p(self):
         node = LeafNode("p", "Hello, world!")
@@ -45,6 +66,11 @@ class TestHTMLNode(unittest.TestCase):
             """<p href="https://www.google.com" target="_blank">Hello, world!</p>""",
         )
 
+    def test_leaf_escapes_value(self):
+        node = LeafNode("a", "< Back & forth >", props={"href": "/"})
+        self.assertEqual(node.to_html(), '<a href="/">&lt; Back &amp; forth &gt;</a>')
+        self.assertEqual(LeafNode(value='"quoted"').to_html(), '"quoted"')
+
     def test_leaf_with_children(self):
         with self.assertRaises(ValueError) as context:
             LeafNode("p", "Hello, world!", "Some children")
@@ -55,6 +81,9 @@ class TestHTMLNode(unittest.TestCase):
             LeafNode(tag="p")
         self.assertEqual(str(context.exception), "All leaf nodes must have a value.")
 
+    def test_leaf_empty_code(self):
+        self.assertEqual(LeafNode("code", "").to_html(), "<code></code>")
+
     ## Parent node tests
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
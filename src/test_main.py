@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+from main import find_pages, iter_pages
+
+
+class TestIterPages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(self.content)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, *parts):
+        path = os.path.join(self.content, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("# Page")
+        return path
+
+    def test_depth_first_name_order(self):
+        self._touch("b.md")
+        self._touch("a", "z.md")
+        self._touch("a", "b", "index.md")
+        self._touch("c", "notes.txt")
+        self._touch("index.md")
+        pages = list(iter_pages(self.content, "out"))
+        expected = ["a/b/index", "a/z", "b", "index"]
+        self.assertEqual(
+            pages,
+            [
+                (
+                    os.path.join(self.content, *name.split("/")) + ".md",
+                    os.path.join("out", *name.split("/")) + ".html",
+                )
+                for name in expected
+            ],
+        )
+        self.assertEqual(find_pages(self.content, "out"), pages)
+
+    def test_deeper_than_recursion_limit(self):
+        # Built and removed with loops: makedirs and rmtree recurse themselves
+        dirs = [self.content]
+        for _ in range(sys.getrecursionlimit() + 50):
+            dirs.append(os.path.join(dirs[-1], "d"))
+            os.mkdir(dirs[-1])
+        path = os.path.join(dirs[-1], "index.md")
+        open(path, "w").close()
+        try:
+            pages = [src for src, _ in iter_pages(self.content, "out")]
+            self.assertEqual(pages, [path])
+        finally:
+            os.remove(path)
+            for directory in reversed(dirs[1:]):
+                os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from output import (
+    BundleWriter,
+    OutputWriter,
+    mirror_tree,
+    remove_set_aside,
+    replace_directory,
+    write_atomic,
+)
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_write_atomic_creates_dirs(self):
+        path = os.path.join(self.root, "a", "b.html")
+        write_atomic(path, b"hello")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"hello")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["b.html"])
+
+    def test_write_atomic_file_modes(self):
+        plain = os.path.join(self.root, "plain")
+        open(plain, "w").close()
+        path = os.path.join(self.root, "index.html")
+        write_atomic(path, b"new")
+        self.assertEqual(os.stat(path).st_mode, os.stat(plain).st_mode)
+        os.chmod(path, 0o640)
+        write_atomic(path, b"changed")
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    def test_identical_write_is_skipped(self):
+        path = os.path.join(self.root, "index.html")
+        writer = OutputWriter()
+        self.assertTrue(writer.write(path, "<p>hi</p>"))
+        os.utime(path, ns=(1, 1))
+        self.assertFalse(OutputWriter().write(path, "<p>hi</p>"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 1)
+
+    def test_changed_write_replaces_file(self):
+        path = os.path.join(self.root, "index.html")
+        OutputWriter().write(path, "<p>hi</p>")
+        self.assertTrue(OutputWriter().write(path, "<p>bye</p>"))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "<p>bye</p>")
+
+    def test_manifest_round_trip(self):
+        manifest = os.path.join(self.root, "manifest.json")
+        path = os.path.join(self.root, "out", "index.html")
+        writer = OutputWriter(manifest)
+        writer.write(path, "<p>hi</p>")
+        writer.save_manifest()
+
+        writer = OutputWriter(manifest)
+        self.assertIn(os.path.abspath(path), writer.manifest)
+        self.assertFalse(writer.write(path, "<p>hi</p>"))
+        self.assertEqual(writer.skipped, 1)
+
+    def test_prune_removes_unwritten_files(self):
+        out = os.path.join(self.root, "out")
+        writer = OutputWriter()
+        writer.write(os.path.join(out, "keep.html"), "keep")
+        os.makedirs(os.path.join(out, "old"))
+        stale = os.path.join(out, "old", "stale.html")
+        with open(stale, "w") as f:
+            f.write("stale")
+
+        self.assertEqual(writer.prune(out), [os.path.abspath(stale)])
+        self.assertEqual(os.listdir(out), ["keep.html"])
+
+    def test_mirror_build_and_replace(self):
+        public = os.path.join(self.root, "public")
+        staging = os.path.join(self.root, "staging")
+        OutputWriter().write(os.path.join(public, "a", "old.html"), "old")
+        OutputWriter().write(os.path.join(public, "same.html"), "same")
+        mirror_tree(public, staging)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(public, "same.html"), os.path.join(staging, "same.html")
+            )
+        )
+
+        writer = OutputWriter()
+        writer.write(os.path.join(staging, "a", "old.html"), "new")
+        writer.write(os.path.join(staging, "same.html"), "same")
+        writer.prune(staging)
+        with open(os.path.join(public, "a", "old.html")) as f:
+            self.assertEqual(f.read(), "old")
+
+        cache = os.path.join(self.root, "cache")
+        replace_directory(staging, public, cache)
+        self.assertFalse(os.path.exists(staging))
+        self.assertEqual(sorted(os.listdir(self.root)), ["cache", "public"])
+        self.assertEqual(os.listdir(cache), [])
+        with open(os.path.join(public, "a", "old.html")) as f:
+            self.assertEqual(f.read(), "new")
+
+    def test_remove_set_aside(self):
+        os.makedirs(os.path.join(self.root, ".old-abc", "blog"))
+        os.makedirs(os.path.join(self.root, "staging"))
+        remove_set_aside(self.root)
+        self.assertEqual(os.listdir(self.root), ["staging"])
+
+
+class TestBundleWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.site = os.path.join(self.root, "docs")
+        self.asset = os.path.join(self.root, "logo.png")
+        with open(self.asset, "wb") as f:
+            f.write(b"\x89PNG" * 300)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _fill(self, writer):
+        writer.write(os.path.join(self.site, "index.html"), "<p>home</p>")
+        writer.write(os.path.join(self.site, "blog", "a.html"), b"<p>a</p>")
+        writer.copy(self.asset, os.path.join(self.site, "images", "logo.png"))
+
+    def test_zip_bundle(self):
+        bundle = os.path.join(self.root, "site.zip")
+        with BundleWriter(bundle, self.site) as writer:
+            self._fill(writer)
+        self.assertEqual(writer.written, 3)
+        self.assertFalse(os.path.exists(self.site))
+        with zipfile.ZipFile(bundle) as zf:
+            self.assertEqual(
+                zf.namelist(), ["index.html", "blog/a.html", "images/logo.png"]
+            )
+            self.assertEqual(zf.read("blog/a.html"), b"<p>a</p>")
+            self.assertEqual(zf.read("images/logo.png"), b"\x89PNG" * 300)
+
+    def test_tar_bundle_index_points_at_data(self):
+        bundle = os.path.join(self.root, "site.tar")
+        with BundleWriter(bundle, self.site) as writer:
+            self._fill(writer)
+        with open(bundle + ".index.json", encoding="utf-8") as f:
+            index = json.load(f)
+        with open(bundle, "rb") as f:
+            raw = f.read()
+        with tarfile.open(bundle) as tar:
+            self.assertEqual(sorted(tar.getnames()), sorted(index))
+            for name, (offset, size) in index.items():
+                self.assertEqual(
+                    raw[offset : offset + size], tar.extractfile(name).read()
+                )
+
+    def test_gzip_tar_has_no_index(self):
+        bundle = os.path.join(self.root, "site.tar.gz")
+        with BundleWriter(bundle, self.site) as writer:
+            self._fill(writer)
+        self.assertFalse(os.path.exists(bundle + ".index.json"))
+        with tarfile.open(bundle) as tar:
+            self.assertEqual(tar.extractfile("index.html").read(), b"<p>home</p>")
+
+    def test_failed_build_keeps_previous_bundle(self):
+        bundle = os.path.join(self.root, "site.zip")
+        with BundleWriter(bundle, self.site) as writer:
+            self._fill(writer)
+        with self.assertRaises(RuntimeError):
+            with BundleWriter(bundle, self.site) as writer:
+                writer.write(os.path.join(self.site, "new.html"), "new")
+                raise RuntimeError("build failed")
+        with zipfile.ZipFile(bundle) as zf:
+            self.assertNotIn("new.html", zf.namelist())
+        self.assertEqual(sorted(os.listdir(self.root)), ["logo.png", "site.zip"])
+
+    def test_rejects_paths_outside_root_and_duplicates(self):
+        with BundleWriter(os.path.join(self.root, "site.tar"), self.site) as writer:
+            with self.assertRaises(ValueError):
+                writer.write(os.path.join(self.root, "other.html"), "x")
+            writer.write(os.path.join(self.site, "a.html"), "x")
+            with self.assertRaises(ValueError):
+                writer.write(os.path.join(self.site, "a.html"), "y")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            BundleWriter(os.path.join(self.root, "site.rar"), self.site)
+        self.assertEqual(os.listdir(self.root), ["logo.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
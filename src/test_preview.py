@@ -0,0 +1,162 @@
+import http.client
+import os
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+import events
+from preview import PreviewSite
+from server import start_in_thread
+
+
+class TestPreviewSite(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        self._write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self._write(os.path.join(self.static, "index.css"), "body {}")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        self._write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self._write(os.path.join(self.content, "about.md"), "# About")
+        self.site = PreviewSite(self.content, self.template, self.static)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        # Make every rewrite visible to stat, however coarse the clock
+        st = os.stat(path)
+        bump = getattr(self, "_bump", 0) + 1
+        self._bump = bump
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump * 10**9))
+
+    def body(self, url_path):
+        found, location = self.site.lookup(url_path)
+        self.assertIsNone(location)
+        return found.identity.body.decode("utf-8")
+
+    def test_renders_once_then_serves_from_cache(self):
+        self.assertEqual(
+            self.body("/"),
+            '<title>Home</title><div><h1 id="home">Home</h1><p>hello</p></div>',
+        )
+        self.body("/index.html")
+        self.assertEqual((self.site.renders, self.site.hits), (1, 1))
+
+    def test_maps_paths_like_the_build(self):
+        self.assertIn("Blog", self.body("/blog/"))
+        self.assertIn("About", self.body("/about.html"))
+        self.assertEqual(self.body("/index.css"), "body {}")
+        self.assertEqual(self.site.lookup("/blog"), (None, "/blog/"))
+        self.assertEqual(self.site.lookup("/about"), (None, None))
+        self.assertEqual(self.site.lookup("/../template.html"), (None, None))
+        self.assertEqual(self.site.lookup("/missing/"), (None, None))
+
+    def test_serves_under_basepath(self):
+        self._write(self.template, '<link href="/index.css">{{ Content }}')
+        site = PreviewSite(self.content, self.template, self.static, "/site/")
+        found, _ = site.lookup("/site/")
+        self.assertIn(b'href="/site/index.css"', found.identity.body)
+        self.assertEqual(site.lookup("/site/index.css")[0].identity.body, b"body {}")
+        self.assertEqual(site.lookup("/site/blog"), (None, "/site/blog/"))
+        self.assertEqual(site.lookup("/site"), (None, "/site/"))
+        self.assertEqual(site.lookup("/index.css"), (None, None))
+
+    def test_links_file_edits_invalidate(self):
+        links = os.path.join(self._tmp.name, "links.md")
+        self._write(os.path.join(self.content, "about.md"), "# About\n\n[home]")
+        site = PreviewSite(self.content, self.template, self.static, links_path=links)
+        self.assertNotIn(b"<a ", site.lookup("/about.html")[0].identity.body)
+        self._write(links, "[home]: /")
+        body = site.lookup("/about.html")[0].identity.body
+        self.assertIn(b'<a href="/">home</a>', body)
+
+    def test_source_and_template_edits_invalidate(self):
+        self.body("/")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+        self.assertIn("changed", self.body("/"))
+        self._write(self.template, "<h1>{{ Title }}</h1>")
+        self.assertEqual(self.body("/"), "<h1>Home</h1>")
+        self.assertEqual(self.site.renders, 3)
+
+    def test_new_section_template_invalidates(self):
+        self.assertIn("<title>Blog</title>", self.body("/blog/"))
+        section = os.path.join(self._tmp.name, "templates", "blog.html")
+        self._write(section, "<h2>{{ Title }}</h2>")
+        self.assertEqual(self.body("/blog/"), "<h2>Blog</h2>")
+        self.assertIn("<title>Home</title>", self.body("/"))
+
+    def test_lru_evicts_least_recently_used(self):
+        site = PreviewSite(self.content, self.template, self.static, max_files=2)
+        for path in ("/", "/blog/", "/", "/about.html", "/"):
+            site.lookup(path)
+        self.assertEqual(site.renders, 3)
+        site.lookup("/blog/")
+        self.assertEqual(site.renders, 4)
+
+    def test_concurrent_requests_render_once(self):
+        calls = []
+        render = self.site._render_page
+
+        def slow_render(source):
+            calls.append(source)
+            time.sleep(0.05)
+            return render(source)
+
+        self.site._render_page = slow_render
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.site.lookup("/")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(found) for found, _ in results}), 1)
+
+    def test_render_errors_are_not_cached(self):
+        self._write(os.path.join(self.content, "untitled.md"), "no title")
+        with self.assertRaises(ValueError):
+            self.site.lookup("/untitled.html")
+        self._write(os.path.join(self.content, "untitled.md"), "# Titled")
+        self.assertIn("Titled", self.body("/untitled.html"))
+
+    def test_served_over_http(self):
+        server = start_in_thread(self.site)
+        conn = http.client.HTTPConnection(*server.server_address[:2])
+        try:
+            conn.request("GET", "/blog/")
+            response = conn.getresponse()
+            response.read()
+            self.assertEqual(response.status, 200)
+            etag = response.headers["ETag"]
+            conn.request("GET", "/blog/", headers={"If-None-Match": etag})
+            response = conn.getresponse()
+            response.read()
+            self.assertEqual(response.status, 304)
+            self._write(os.path.join(self.content, "broken.md"), "no title")
+            log = StringIO()
+            events.configure(log)
+            conn.request("GET", "/broken.html")
+            response = conn.getresponse()
+            response.read()
+            self.assertEqual(response.status, 500)
+            self.assertIn("No H1 header found", log.getvalue())
+        finally:
+            events.configure()
+            conn.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from functions import markdown_to_html, markdown_to_html_node
+from htmlnode import ParentNode
+from renderer import HTMLRenderer, NodeTreeRenderer, Renderer
+
+
+DOCUMENTS = [
+    "# Title\n\nSome **bold**, _italic_ and `code`.",
+    "![alt](/a.png) and a [link](https://example.com)",
+    "> quote line\n>\n> -- author",
+    "> intro\n>\n> - one\n> - two",
+    "- a\n  - b\n    - c\n- d",
+    "1. one\n\n   more\n2. two",
+    "```python\ndef f():\n    return 1\n```",
+    "```\nplain code\n```",
+    "```elflang\nfunc main(){}\n```",
+]
+
+
+class TestRenderers(unittest.TestCase):
+    def test_direct_html_matches_node_tree(self):
+        for md in DOCUMENTS:
+            with self.subTest(md=md):
+                expected = markdown_to_html_node(md).to_html()
+                self.assertEqual(markdown_to_html(md), expected)
+
+    def test_node_tree_renderer_returns_nodes(self):
+        root = markdown_to_html("# Hi", NodeTreeRenderer())
+        self.assertIsInstance(root, ParentNode)
+        self.assertEqual(root.to_html(), "<div><h1>Hi</h1></div>")
+
+    def test_both_reject_empty_leaf(self):
+        with self.assertRaises(ValueError):
+            markdown_to_html("a **** b")
+        with self.assertRaises(ValueError):
+            markdown_to_html_node("a **** b")
+
+    def test_html_renderer_rejects_empty_element(self):
+        renderer = HTMLRenderer()
+        renderer.open("p")
+        with self.assertRaises(ValueError):
+            renderer.close()
+
+    def test_custom_renderer(self):
+        class TagCounter(Renderer):
+            def __init__(self):
+                self.tags = []
+
+            def open(self, tag, props=None):
+                self.tags.append(tag)
+
+            def close(self):
+                pass
+
+            def leaf(self, tag, value, props=None):
+                if tag:
+                    self.tags.append(tag)
+
+            def result(self):
+                return self.tags
+
+        tags = markdown_to_html("# **Hi**\n\n- [x](/y)", TagCounter())
+        self.assertEqual(tags, ["div", "h1", "b", "ul", "li", "a"])
+
+    def test_deep_nesting_renders_without_recursion(self):
+        md = "\n".join("  " * i + "- x" for i in range(1200))
+        html = markdown_to_html(md)
+        self.assertEqual(html.count("<ul>"), 1200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import gzip
+import http.client
+import os
+import tempfile
+import unittest
+from output import BundleWriter
+from server import SiteFiles, parse_address, start_in_thread
+
+PAGE = "<html><body>" + "<p>hello world</p>" * 50 + "</body></html>"
+
+
+class TestSiteServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.root = os.path.join(cls._tmp.name, "docs")
+        cls._write("index.html", PAGE)
+        cls._write("blog/index.html", "<p>blog</p>")
+        cls._write("index.css", "body {}")
+        cls.server = start_in_thread(SiteFiles.from_directory(cls.root))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls._tmp.cleanup()
+
+    @classmethod
+    def _write(cls, rel, text):
+        path = os.path.join(cls.root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def setUp(self):
+        self.conn = http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def request(self, path, method="GET", **headers):
+        self.conn.request(method, path, headers=headers)
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_get_sets_length_type_and_etag(self):
+        response, body = self.request("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, PAGE.encode())
+        self.assertEqual(response.headers["Content-Length"], str(len(body)))
+        self.assertEqual(response.headers["Content-Type"], "text/html; charset=utf-8")
+        self.assertTrue(response.headers["ETag"].startswith('"'))
+        self.assertIsNotNone(response.headers["Date"])
+
+    def test_conditional_get_returns_304(self):
+        response, _ = self.request("/index.css")
+        etag = response.headers["ETag"]
+        response, body = self.request("/index.css", **{"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        response, _ = self.request("/index.css", **{"If-None-Match": '"other"'})
+        self.assertEqual(response.status, 200)
+
+    def test_gzip_variant(self):
+        response, body = self.request("/", **{"Accept-Encoding": "br, gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body), PAGE.encode())
+        self.assertTrue(response.headers["ETag"].endswith('-gz"'))
+        response, _ = self.request("/", **{"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(response.headers["Content-Encoding"])
+        # Too small to be worth compressing
+        response, _ = self.request("/index.css", **{"Accept-Encoding": "gzip"})
+        self.assertIsNone(response.headers["Content-Encoding"])
+
+    def test_head_has_no_body(self):
+        response, body = self.request("/", method="HEAD")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers["Content-Length"], str(len(PAGE)))
+        self.assertEqual(body, b"")
+        # The connection is still usable afterwards
+        response, body = self.request("/blog/")
+        self.assertEqual(body, b"<p>blog</p>")
+
+    def test_directory_redirect_and_missing(self):
+        response, _ = self.request("/blog?x=1")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.headers["Location"], "/blog/?x=1")
+        response, _ = self.request("/missing.html")
+        self.assertEqual(response.status, 404)
+        response, _ = self.request("/../index.html")
+        self.assertEqual(response.status, 404)
+
+    def test_serves_bundles_like_directories(self):
+        for name in ("site.zip", "site.tar"):
+            bundle = os.path.join(self._tmp.name, name)
+            with BundleWriter(bundle, self.root) as writer:
+                for dirpath, _, filenames in os.walk(self.root):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        writer.copy(path, path)
+            from_bundle = SiteFiles.from_bundle(bundle)
+            from_dir = SiteFiles.from_directory(self.root)
+            self.assertEqual(set(from_bundle.files), set(from_dir.files))
+            for path, static_file in from_dir.files.items():
+                self.assertEqual(
+                    from_bundle.files[path].identity.etag, static_file.identity.etag
+                )
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("8888"), ("127.0.0.1", 8888))
+        self.assertEqual(parse_address(":80"), ("127.0.0.1", 80))
+        self.assertEqual(parse_address("0.0.0.0:80"), ("0.0.0.0", 80))
+        with self.assertRaises(ValueError):
+            parse_address("host")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from output import OutputWriter
+from sharding import (
+    merge_shards,
+    parse_shard,
+    partition_pages,
+    reset_shard_dir,
+    shard_dir,
+)
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+    def test_parse_shard_out_of_range(self):
+        with self.assertRaises(ValueError):
+            parse_shard("0/4")
+        with self.assertRaises(ValueError):
+            parse_shard("5/4")
+
+    def test_parse_shard_malformed(self):
+        with self.assertRaises(ValueError):
+            parse_shard("two")
+
+    def test_partition_balanced_and_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pages = []
+            for name, size in [("a", 100), ("b", 60), ("c", 50), ("d", 10)]:
+                path = os.path.join(tmp, f"{name}.md")
+                with open(path, "w") as f:
+                    f.write("x" * size)
+                pages.append((path, path[:-3] + ".html"))
+
+            shards = partition_pages(pages, 2)
+            self.assertEqual(shards, partition_pages(list(reversed(pages)), 2))
+            sizes = [sum(os.path.getsize(src) for src, _ in s) for s in shards]
+            self.assertEqual(sorted(sizes), [110, 110])
+            self.assertEqual(sorted(p for s in shards for p in s), sorted(pages))
+
+    def test_merge_uses_only_the_given_shard_count(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            shards = os.path.join(tmp, "shards")
+            public = os.path.join(tmp, "public")
+            static = os.path.join(tmp, "static")
+            os.makedirs(static)
+
+            def write(index, count, name):
+                path = os.path.join(shard_dir(shards, index, count), name)
+                OutputWriter().write(path, name)
+
+            write(1, 3, "old.html")
+            write(1, 2, "stale.html")
+            reset_shard_dir(shards, 1, 2)
+            write(1, 2, "a.html")
+            with self.assertRaises(ValueError):
+                merge_shards(shards, static, public, OutputWriter(), 2)
+            reset_shard_dir(shards, 2, 2)
+            write(2, 2, "b.html")
+
+            with redirect_stdout(StringIO()):
+                merge_shards(shards, static, public, OutputWriter(), 2)
+            self.assertEqual(sorted(os.listdir(public)), ["a.html", "b.html"])
+
+    def test_merge_cli_reports_missing_shard(self):
+        # No shard outputs exist for this count, so nothing is written
+        result = subprocess.run(
+            [sys.executable, "main.py", "--merge", "997"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("error: No output for shard 1/997", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
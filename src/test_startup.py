@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import unittest
+import bench_startup
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_MODULES = {"functions", "block_parser", "highlight", "templates", "json"}
+# Wall-clock times are noisy under load, so the budget check only runs when
+# asked for (CHECK_STARTUP_BUDGET=1) and only catches large regressions;
+# bench_startup.py enforces the budgets themselves
+BUDGET_HEADROOM = 3
+
+
+def imported_modules(code):
+    """Run `code` in a fresh interpreter and return the modules it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print(' '.join(sys.modules))"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestStartupImports(unittest.TestCase):
+    def test_cli_import_skips_pipeline(self):
+        modules = imported_modules("import main")
+        unexpected = PIPELINE_MODULES | {"output", "copy_static"}
+        self.assertEqual(modules & unexpected, set())
+
+    def test_rebuild_client_skips_pipeline(self):
+        modules = imported_modules("import daemon")
+        self.assertEqual(modules & (PIPELINE_MODULES - {"json"}), set())
+
+    def test_htmlnode_does_not_load_json(self):
+        self.assertNotIn("json", imported_modules("import htmlnode"))
+
+
+@unittest.skipUnless(
+    os.environ.get("CHECK_STARTUP_BUDGET"), "CHECK_STARTUP_BUDGET is not set"
+)
+class TestStartupBudget(unittest.TestCase):
+    def test_import_times_within_budget(self):
+        for label, (best, budget) in bench_startup.measure(repeat=3).items():
+            with self.subTest(label):
+                self.assertLessEqual(best, budget * BUDGET_HEADROOM)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+import unittest
+from templates import (
+    TemplateError,
+    compile_template,
+    load_template,
+    refresh_templates,
+    section_template,
+    template_from_string,
+)
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_placeholders(self):
+        template = template_from_string("<h1>{{ Title }}</h1>{ raw }{{ Other }}")
+        self.assertEqual(
+            template.render({"Title": "Hi"}), "<h1>Hi</h1>{ raw }{{ Other }}"
+        )
+
+    def test_include_and_extends(self):
+        self._write("partials/nav.html", "<nav>{{ Title }}</nav>")
+        base = self._write(
+            "base.html",
+            '<body>{% include "partials/nav.html" %}'
+            "{% block main %}default{% endblock %}"
+            "{% block footer %}footer{% endblock %}</body>",
+        )
+        blog = self._write(
+            "templates/blog.html",
+            '{% extends "../base.html" %}{% block main %}<article>{{ Content }}'
+            "</article>{% endblock %}",
+        )
+        template = compile_template(blog)
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            "<body><nav>T</nav><article>C</article>footer</body>",
+        )
+        self.assertEqual(
+            template.dependencies,
+            {blog, base, os.path.join(self.root, "partials", "nav.html")},
+        )
+
+    def test_include_cycle(self):
+        path = self._write("a.html", '{% include "b.html" %}')
+        self._write("b.html", '{% include "a.html" %}')
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_unclosed_block(self):
+        path = self._write("a.html", "{% block main %}x")
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_refresh_after_partial_change(self):
+        partial = self._write("partial.html", "old")
+        path = self._write("page.html", '{% include "partial.html" %}')
+        self.assertEqual(load_template(path).render({}), "old")
+        self.assertNotIn(os.path.abspath(path), refresh_templates())
+
+        time.sleep(0.01)
+        self._write("partial.html", "newer")
+        self.assertIn(os.path.abspath(path), refresh_templates())
+        self.assertEqual(load_template(path).render({}), "newer")
+        self.assertTrue(os.path.exists(partial))
+
+    def test_section_template(self):
+        default = self._write("template.html", "")
+        blog = self._write("templates/blog.html", "")
+        content = os.path.join(self.root, "content")
+
+        def pick(rel):
+            return section_template(content, os.path.join(content, rel), default)
+
+        self.assertEqual(pick("blog/tom/index.md"), blog)
+        self.assertEqual(pick("contact/index.md"), default)
+        self.assertEqual(pick("index.md"), default)
+
+
+if __name__ == "__main__":
+    unittest.main()
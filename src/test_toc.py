@@ -0,0 +1,65 @@
+import unittest
+from functions import markdown_to_html, markdown_to_html_node
+from toc import Outline, slugify
+
+
+class TestToc(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(
+            slugify("Why Tom Bombadil Was a Mistake!"), "why-tom-bombadil-was-a-mistake"
+        )
+        self.assertEqual(slugify("  ???  "), "section")
+
+    def test_duplicate_slugs(self):
+        outline = Outline()
+        texts = ("Intro", "Intro", "Intro 1", "Intro")
+        slugs = [outline.add(2, text) for text in texts]
+        self.assertEqual(slugs, ["intro", "intro-1", "intro-1-1", "intro-2"])
+
+    def test_many_duplicate_slugs(self):
+        outline = Outline()
+        outline.add(2, "Intro 2")
+        slugs = [outline.add(2, "Intro") for _ in range(1000)]
+        self.assertEqual(len(set(slugs)), 1000)
+        self.assertEqual(slugs[:4], ["intro", "intro-1", "intro-3", "intro-4"])
+
+    def test_headings_get_ids_in_one_pass(self):
+        outline = Outline()
+        md = "# Title\n\n## The **Bold** Part\n\n## Title"
+        html = markdown_to_html(md, outline=outline)
+        self.assertEqual(
+            html,
+            '<div><h1 id="title">Title</h1>'
+            '<h2 id="the-bold-part">The <b>Bold</b> Part</h2>'
+            '<h2 id="title-1">Title</h2></div>',
+        )
+        self.assertEqual(
+            outline.headings,
+            [
+                (1, "Title", "title"),
+                (2, "The Bold Part", "the-bold-part"),
+                (2, "Title", "title-1"),
+            ],
+        )
+
+    def test_node_tree_gets_ids(self):
+        outline = Outline()
+        root = markdown_to_html_node("## Hi", outline)
+        self.assertEqual(root.children[0].props, {"id": "hi"})
+
+    def test_no_outline_no_ids(self):
+        self.assertEqual(markdown_to_html("## Hi"), "<div><h2>Hi</h2></div>")
+
+    def test_outline_html(self):
+        outline = Outline()
+        markdown_to_html("# T\n\n## A\n\n### B\n\n## C", outline=outline)
+        self.assertEqual(
+            outline.to_html(),
+            '<nav class="toc"><ul><li><a href="#a">A</a><ul><li><a href="#b">B</a>'
+            '</li></ul></li><li><a href="#c">C</a></li></ul></nav>',
+        )
+        self.assertEqual(Outline().to_html(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import re
+from htmlnode import escape_text
+
+_NON_SLUG_CHARS = re.compile(r"[^\w\- ]+")
+
+
+def slugify(text: str) -> str:
+    """Turn heading text into an anchor id: lowercase, words joined by '-'."""
+    slug = _NON_SLUG_CHARS.sub("", text.strip().lower())
+    return slug.replace(" ", "-") or "section"
+
+
+class Outline:
+    """
+    Heading outline of one document, filled in while it is rendered.
+
+    `add` records a heading and returns a slug that is unique within the
+    document ("intro", "intro-1", ...), used as the heading's id.
+    """
+
+    def __init__(self):
+        # (level, text, slug) in document order
+        self.headings = []
+        self._used = set()
+        # base slug -> last suffix tried, so repeats don't rescan from 1
+        self._suffixes = {}
+
+    def add(self, level: int, text: str) -> str:
+        base = slugify(text)
+        slug = base
+        suffix = self._suffixes.get(base, 0)
+        # A suffixed slug can also be taken by a heading whose text is
+        # literally "intro-1", so keep checking
+        while slug in self._used:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        self._suffixes[base] = suffix
+        self._used.add(slug)
+        self.headings.append((level, text, slug))
+        return slug
+
+    def to_html(self, min_level: int = 2, max_level: int = 6) -> str:
+        """Render headings between min_level and max_level as nested lists.
+
+        The page title (h1) is skipped by default. Returns an empty string
+        when there are no headings in range.
+        """
+        headings = [h for h in self.headings if min_level <= h[0] <= max_level]
+        if not headings:
+            return ""
+
+        out = ['<nav class="toc">']
+        levels = []
+        for level, text, slug in headings:
+            if not levels or level > levels[-1]:
+                out.append("<ul>")
+                levels.append(level)
+            else:
+                out.append("</li>")
+                while len(levels) > 1 and level <= levels[-2]:
+                    out.append("</ul></li>")
+                    levels.pop()
+                levels[-1] = level
+            out.append(f'<li><a href="#{slug}">{escape_text(text)}</a>')
+        out.append("</li></ul>" * len(levels))
+        out.append("</nav>")
+        return "".join(out)